@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Shared git clone machinery for the phase downloaders.
+Phase 1 and Phase 3 delegate their repository cloning here so the
+subprocess handling, caching and git configuration live in one place.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import random
+import shutil
+import signal
+import time
+from typing import List, Optional, Tuple
+
+# Optional libgit2 bindings - clones in-process, skipping the
+# fork/exec and startup cost of a git subprocess per repo
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+# Per-repo status goes through logging - stdout flushes per print add
+# up across a concurrent batch, and log records are filterable
+_log = logging.getLogger(__name__)
+
+# Environment shared by every git invocation: protocol v2 over HTTP/2
+# lets concurrent fetches to the same host multiplex one TLS
+# connection instead of paying a handshake per repo, the cache
+# credential helper reuses credentials across a batch, and the
+# low-speed limits abort a transfer crawling under 1 KB/s for 30s so
+# it can be retried instead of pinning a slot until the timeout.
+_GIT_ENV = {
+    **os.environ,
+    "GIT_CONFIG_COUNT": "5",
+    "GIT_CONFIG_KEY_0": "protocol.version",
+    "GIT_CONFIG_VALUE_0": "2",
+    "GIT_CONFIG_KEY_1": "http.version",
+    "GIT_CONFIG_VALUE_1": "HTTP/2",
+    "GIT_CONFIG_KEY_2": "credential.helper",
+    "GIT_CONFIG_VALUE_2": "cache",
+    "GIT_CONFIG_KEY_3": "http.lowSpeedLimit",
+    "GIT_CONFIG_VALUE_3": "1000",
+    "GIT_CONFIG_KEY_4": "http.lowSpeedTime",
+    "GIT_CONFIG_VALUE_4": "30",
+}
+
+# stderr fragments that mark a failure worth retrying - rate limits,
+# dropped connections and stalled transfers, not bad URLs or auth
+_TRANSIENT_ERRORS = ("429", "unable to access", "Connection reset",
+                     "early EOF", "RPC failed", "transfer closed")
+
+
+# One minute of TTL is plenty here - the probe only needs to be fresh
+# across a single run, and the bucket key expires stale answers when
+# the tool is re-invoked later.
+@functools.lru_cache(maxsize=4096)
+def _already_downloaded(path_str: str, time_bucket: int) -> bool:
+    """Check whether a clone target already has content.
+
+    One os.scandir answers both "does the directory exist" and "is it
+    non-empty" (a .git entry is content too), replacing the three
+    separate stat-based probes, and the lru_cache makes repeat checks
+    for the same directory free within a time bucket.
+
+    Args:
+        path_str: Directory to probe
+        time_bucket: Coarse timestamp that expires cached answers
+
+    Returns:
+        bool: True if the directory exists and is non-empty
+    """
+    try:
+        with os.scandir(path_str) as it:
+            return next(iter(it), None) is not None
+    except OSError:
+        return False
+
+
+def check_already_downloaded(target_dir) -> bool:
+    """Check if a repository already exists and is valid.
+
+    Args:
+        target_dir: Directory to check (str or Path)
+
+    Returns:
+        bool: True if already exists and valid
+    """
+    path_str = os.fspath(target_dir)
+    bucket = int(time.time() // 60)
+    # A sibling <dir>.git is the sentinel for the bare-plus-worktree
+    # layout; checked second so the common case stays one probe
+    return (_already_downloaded(path_str, bucket)
+            or _already_downloaded(path_str + ".git", bucket))
+
+
+async def _run_git(argv: List[str], timeout: int) -> Tuple[int, str]:
+    """Run one git command without blocking the event loop.
+
+    Args:
+        argv: Full git command line
+        timeout: Seconds before the process group is killed
+
+    Returns:
+        Tuple of (returncode, error output; empty on success)
+    """
+    # stdout goes straight to /dev/null - only stderr matters, and
+    # only on failure, so nothing is buffered for happy-path clones.
+    # The process leads its own group so a timeout can take down
+    # git's helpers (git-remote-https, ssh) with it - killing just
+    # the parent leaves them holding bandwidth and FDs.
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        env=_GIT_ENV,
+        start_new_session=True
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill_group(proc.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(proc.wait(), 2)
+        except asyncio.TimeoutError:
+            _kill_group(proc.pid, signal.SIGKILL)
+            await proc.wait()
+        raise
+    error_msg = stderr.decode().strip() if proc.returncode != 0 else ""
+    return proc.returncode, error_msg
+
+
+def _kill_group(pid: int, sig: int) -> None:
+    """Signal a process group, ignoring an already-gone leader.
+
+    Args:
+        pid: Group leader's pid
+        sig: Signal to deliver
+    """
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def clone_repo(url: str, target_dir: str,
+                     semaphore: asyncio.Semaphore,
+                     update: bool = False,
+                     reference: Optional[str] = None,
+                     sparse_patterns: Optional[Tuple[str, ...]] = None,
+                     bare_worktree: bool = False,
+                     allow_pygit2: bool = False,
+                     recurse_submodules: bool = False) -> Tuple[bool, str]:
+    """Clone a git repository with error handling.
+
+    The target arrives as a plain string - argv assembly and the
+    probes below then need no per-call Path construction.
+
+    Args:
+        url: Git repository URL
+        target_dir: Target directory for cloning (string path)
+        semaphore: Bounds how many git processes run at once
+        update: Refresh an existing clone with fetch + reset
+        reference: Shared object store passed to --reference-if-able
+        sparse_patterns: When set, clone with --no-checkout and
+            sparse-checkout only the matching paths
+        bare_worktree: Clone bare into <target_dir>.git and expose
+            the files as a detached worktree at target_dir, keeping
+            repository metadata out of the dataset tree
+        allow_pygit2: Try an in-process pygit2 clone first (skipped
+            when sparse_patterns is set - libgit2 has no equivalent)
+        recurse_submodules: Clone submodules too, shallow and with
+            git's own parallel fetch machinery (-j 8), instead of
+            leaving them uninitialized
+
+    Returns:
+        Tuple of (success: bool, message: str)
+    """
+    name = os.path.basename(target_dir)
+    # Submodule-heavy repos move a larger working set, so they get a
+    # longer leash; also quoted by the timeout error message
+    clone_timeout = 1200 if recurse_submodules else 300
+    try:
+        # The worktree's .git is a file pointing at the bare store,
+        # so the layouts need different existence markers
+        if bare_worktree:
+            git_marker = os.path.isdir(target_dir + ".git")
+        else:
+            git_marker = os.path.isdir(os.path.join(target_dir, ".git"))
+
+        # Check if already downloaded
+        if check_already_downloaded(target_dir):
+            if update and git_marker:
+                _log.info("  🔄 Updating %s...", name)
+                try:
+                    # Shallow fetch plus hard reset skips the merge
+                    # machinery and hooks a pull would run, and moves
+                    # a minimal packfile
+                    async with semaphore:
+                        returncode, _ = await _run_git(
+                            ["git", "-C", target_dir, "fetch",
+                             "--depth", "1", "--filter=blob:none",
+                             "origin"],
+                            timeout=300
+                        )
+                        if returncode == 0:
+                            returncode, _ = await _run_git(
+                                ["git", "-C", target_dir,
+                                 "reset", "--hard", "FETCH_HEAD"],
+                                timeout=300
+                            )
+                    if returncode == 0:
+                        _log.info("  ✅ Updated %s", name)
+                        return True, f"Updated: {name}"
+                    else:
+                        _log.warning("  ⚠️  Update failed, keeping existing: %s", name)
+                        return True, f"Already exists: {name}"
+                except Exception as e:
+                    _log.warning("  ⚠️  Update failed: %s, keeping existing", e)
+                    return True, f"Already exists: {name}"
+            else:
+                _log.info("  ⏭️  Already exists: %s", name)
+                return True, f"Already exists: {name}"
+
+        _log.info("  📦 Cloning %s...", url)
+        if (allow_pygit2 and pygit2 is not None and sparse_patterns is None
+                and not recurse_submodules):
+            # In-process shallow clone - no fork/exec per repo.
+            # libgit2 releases the GIL during network I/O, so
+            # to_thread keeps the clones genuinely concurrent.
+            try:
+                async with semaphore:
+                    await asyncio.to_thread(
+                        pygit2.clone_repository, url, target_dir,
+                        depth=1
+                    )
+                _already_downloaded.cache_clear()
+                _log.info("  ✅ Successfully cloned to %s", name)
+                return True, f"Successfully cloned: {name}"
+            except Exception as e:
+                _log.warning("  ⚠️  pygit2 clone failed (%s), retrying with git...", e)
+
+        # Single branch, no tags, blobs fetched lazily - only content
+        # that is actually checked out crosses the network
+        git_dir = target_dir + ".git"
+        argv = ["git", "clone", "--quiet"]
+        if bare_worktree:
+            argv.append("--bare")
+        argv += ["--depth", "1", "--single-branch", "--no-tags",
+                 "--filter=blob:none"]
+        if reference is not None:
+            argv += ["--reference-if-able", os.fspath(reference),
+                     "--dissociate"]
+        if sparse_patterns is not None and not bare_worktree:
+            argv.append("--no-checkout")
+        if recurse_submodules:
+            # Submodules fetch inside the one clone process, eight at
+            # a time, rather than as follow-up serial invocations
+            argv += ["--recurse-submodules", "--shallow-submodules",
+                     "--jobs", "8"]
+        argv += [url, git_dir if bare_worktree else target_dir]
+
+        # A moment of rate limiting or a dropped connection should
+        # not fail the repo for the whole run - transient errors get
+        # up to two jittered exponential-backoff retries
+        for attempt in range(3):
+            async with semaphore:
+                returncode, error_msg = await _run_git(
+                    argv, timeout=clone_timeout)
+                if bare_worktree and returncode == 0:
+                    # Detached worktree - no branch bookkeeping, and the
+                    # checkout is deferred when sparse patterns apply
+                    wt = ["git", "--git-dir", git_dir,
+                          "worktree", "add", "--detach"]
+                    if sparse_patterns is not None:
+                        wt.append("--no-checkout")
+                    wt += [target_dir, "HEAD"]
+                    returncode, error_msg = await _run_git(wt, timeout=300)
+                if sparse_patterns is not None:
+                    # Materialize only the matching paths
+                    if returncode == 0:
+                        returncode, error_msg = await _run_git(
+                            ["git", "-C", target_dir, "sparse-checkout",
+                             "set", "--no-cone", *sparse_patterns],
+                            timeout=60
+                        )
+                    if returncode == 0:
+                        returncode, error_msg = await _run_git(
+                            ["git", "-C", target_dir, "checkout"],
+                            timeout=300
+                        )
+            if returncode == 0 or attempt == 2 or not any(
+                    marker in error_msg for marker in _TRANSIENT_ERRORS):
+                break
+            delay = 2 ** attempt + random.random()
+            _log.info("  🔁 Transient failure for %s, retrying in %.1fs...",
+                      name, delay)
+            # Clear any partial state a failed attempt left behind
+            shutil.rmtree(target_dir, ignore_errors=True)
+            if bare_worktree:
+                shutil.rmtree(git_dir, ignore_errors=True)
+            await asyncio.sleep(delay)
+
+        if returncode == 0:
+            _already_downloaded.cache_clear()
+            _log.info("  ✅ Successfully cloned to %s", name)
+            return True, f"Successfully cloned: {name}"
+        else:
+            # Clear partial state just like the retry path does - a
+            # leftover <dir>.git from a bare clone whose worktree or
+            # sparse steps failed would satisfy the downloaded probe
+            # and silently skip this repo on every later run
+            shutil.rmtree(target_dir, ignore_errors=True)
+            if bare_worktree:
+                shutil.rmtree(git_dir, ignore_errors=True)
+            _log.warning("  ❌ Failed to clone: %s", error_msg)
+            return False, f"Failed: {error_msg}"
+
+    except asyncio.TimeoutError:
+        error_msg = (f"Clone operation timed out after"
+                     f" {clone_timeout // 60} minutes")
+        _log.warning("  ❌ %s", error_msg)
+        return False, error_msg
+    except Exception as e:
+        error_msg = f"Error cloning repository: {str(e)}"
+        _log.warning("  ❌ %s", error_msg)
+        return False, error_msg
+
+
+def clone_batch(repos: List[Tuple[str, str]], base_dir,
+                max_concurrent: int, **kwargs) -> List[Tuple[bool, str]]:
+    """Clone a batch of repositories concurrently.
+
+    The clones are network-bound, so running them under one event
+    loop drops the batch wall-clock from the sum of the clone times
+    to roughly the slowest clone, bounded by the semaphore. The
+    semaphore is created per batch because asyncio primitives cannot
+    be shared across event loops; the git configuration environment
+    and the probe cache are module-global, so they are shared by
+    every phase.
+
+    Args:
+        repos: List of (url, dir_name) tuples
+        base_dir: Directory the repositories are cloned under
+        max_concurrent: Maximum git processes to run at once
+        **kwargs: Forwarded to clone_repo
+
+    Returns:
+        List of (success, message) tuples in input order
+    """
+    async def _clone_all():
+        semaphore = asyncio.Semaphore(max_concurrent)
+        base = os.fspath(base_dir)
+        return await asyncio.gather(*[
+            clone_repo(url, os.path.join(base, dir_name), semaphore, **kwargs)
+            for url, dir_name in repos
+        ])
+
+    return asyncio.run(_clone_all())
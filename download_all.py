@@ -5,15 +5,30 @@ Orchestrates all 5 phases of dataset downloads.
 """
 
 import os
+import io
 import sys
+import logging
 import time
 import json
+import shutil
 import argparse
+import functools
+import importlib.util
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+# Optional fast JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from check_progress import _scandir_recursive, HR_EQ
+
 # Import phase downloaders
 from phase1_ctf_bugbounty import Phase1Downloader
 from phase2_exploits_tools import Phase2Downloader
@@ -22,21 +37,107 @@ from phase4_cve_database import Phase4Downloader
 from phase5_advanced_threats import Phase5Downloader
 
 
+class _ThreadStdoutRouter(io.TextIOBase):
+    """stdout proxy that routes writes to per-thread buffers.
+
+    sys.stdout is process-global, so stacking contextlib's
+    redirect_stdout from several threads makes them capture each
+    other's output. This proxy is installed once; each worker thread
+    registers its own capture buffer, and any thread without one
+    (notably the main thread flushing completed phases) falls through
+    to the real stdout.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def register(self, buffer) -> None:
+        """Route the current thread's writes into buffer."""
+        self._local.buffer = buffer
+
+    def unregister(self) -> None:
+        """Send the current thread's writes back to the real stdout."""
+        self._local.buffer = None
+
+    def write(self, s) -> int:
+        return (getattr(self._local, "buffer", None) or self._default).write(s)
+
+    def flush(self) -> None:
+        (getattr(self._local, "buffer", None) or self._default).flush()
+
+
+@functools.lru_cache(maxsize=1)
+def _probe_dependencies() -> tuple:
+    """Probe required and optional dependencies once.
+
+    Returns:
+        Tuple of (all required deps available, printable report)
+    """
+    dependencies_ok = True
+    lines = []
+
+    # Check git - a PATH lookup instead of a fork+exec
+    if shutil.which("git"):
+        lines.append("  ✅ git is installed")
+    else:
+        lines.append("  ❌ git is not installed")
+        dependencies_ok = False
+
+    # Check Python 3
+    python_version = sys.version_info
+    if python_version.major == 3 and python_version.minor >= 8:
+        lines.append(f"  ✅ Python {python_version.major}.{python_version.minor}.{python_version.micro} is installed")
+    else:
+        lines.append(f"  ❌ Python 3.8+ required (found {python_version.major}.{python_version.minor})")
+        dependencies_ok = False
+
+    # Library probes use find_spec so presence is detected from import
+    # metadata without executing the module (huggingface_hub alone costs
+    # hundreds of milliseconds to actually import).
+
+    # Check requests
+    if importlib.util.find_spec("requests") is not None:
+        lines.append("  ✅ requests library is installed")
+    else:
+        lines.append("  ❌ requests library is not installed")
+        lines.append("     Run: pip install requests")
+        dependencies_ok = False
+
+    # Check tqdm (optional)
+    if importlib.util.find_spec("tqdm") is not None:
+        lines.append("  ✅ tqdm library is installed")
+    else:
+        lines.append("  ⚠️  tqdm library is not installed (optional)")
+
+    # Check huggingface-hub (optional)
+    if importlib.util.find_spec("huggingface_hub") is not None:
+        lines.append("  ✅ huggingface-hub is installed")
+    else:
+        lines.append("  ⚠️  huggingface-hub is not installed (optional, for HF datasets)")
+
+    return dependencies_ok, "\n".join(lines)
+
+
 class MasterDownloader:
     """Master orchestrator for all dataset downloads."""
     
-    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False, skip_malware: bool = False):
+    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False, skip_malware: bool = False, parallel_phases: int = 1):
         """Initialize the master downloader.
-        
+
         Args:
             base_dir: Base directory for all datasets
             update: Whether to update existing repositories
             skip_malware: Skip downloading live malware samples
+            parallel_phases: Number of phases to run concurrently (1 = sequential)
         """
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.update = update
         self.skip_malware = skip_malware
+        self.parallel_phases = max(1, parallel_phases)
+        # Resolved once; reused by every summary/result printout
+        self.base_dir_abs = self.base_dir.absolute()
         
         self.phases = {
             1: ("CTF & Bug Bounty", Phase1Downloader),
@@ -47,81 +148,43 @@ class MasterDownloader:
         }
         
         self.results = {}
-    
+        self._disk_usage_cache: Optional[float] = None
+
     def check_dependencies(self) -> bool:
         """Check if required dependencies are installed.
-        
+
+        The probe results are memoized at module level so repeated
+        invocations (e.g. per-phase runs) do not redo the PATH lookups
+        and imports.
+
         Returns:
             bool: True if all dependencies are available
         """
         print("🔍 Checking Dependencies...")
-        
-        dependencies_ok = True
-        
-        # Check git
-        try:
-            result = subprocess.run(
-                ["git", "--version"],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                print("  ✅ git is installed")
-            else:
-                print("  ❌ git is not installed")
-                dependencies_ok = False
-        except FileNotFoundError:
-            print("  ❌ git is not installed")
-            dependencies_ok = False
-        
-        # Check Python 3
-        python_version = sys.version_info
-        if python_version.major == 3 and python_version.minor >= 8:
-            print(f"  ✅ Python {python_version.major}.{python_version.minor}.{python_version.micro} is installed")
-        else:
-            print(f"  ❌ Python 3.8+ required (found {python_version.major}.{python_version.minor})")
-            dependencies_ok = False
-        
-        # Check requests
-        try:
-            import requests
-            print("  ✅ requests library is installed")
-        except ImportError:
-            print("  ❌ requests library is not installed")
-            print("     Run: pip install requests")
-            dependencies_ok = False
-        
-        # Check tqdm (optional)
-        try:
-            import tqdm
-            print("  ✅ tqdm library is installed")
-        except ImportError:
-            print("  ⚠️  tqdm library is not installed (optional)")
-        
-        # Check huggingface-hub (optional)
-        try:
-            import huggingface_hub
-            print("  ✅ huggingface-hub is installed")
-        except ImportError:
-            print("  ⚠️  huggingface-hub is not installed (optional, for HF datasets)")
-        
+
+        dependencies_ok, report = _probe_dependencies()
+        print(report)
+
         print()
         return dependencies_ok
     
-    def run_phase(self, phase_num: int, phase_name: str, downloader_class) -> Dict:
+    def run_phase(self, phase_num: int, phase_name: str, downloader_class,
+                  live_confirmed: Optional[bool] = None) -> Dict:
         """Execute a single phase with timing.
-        
+
         Args:
             phase_num: Phase number (1-5)
             phase_name: Human-readable phase name
             downloader_class: Downloader class to instantiate
-            
+            live_confirmed: Pre-resolved Phase 5 safety-prompt answer
+                (None lets Phase 5 prompt itself)
+
         Returns:
             Dict: Phase results with timing
         """
-        print(f"\n{'=' * 80}")
+        print(f"\n{HR_EQ}")
         print(f"🚀 Starting Phase {phase_num}: {phase_name}")
-        print(f"{'=' * 80}\n")
+        print(f"{HR_EQ}\n")
         
         start_time = time.time()
         
@@ -129,9 +192,10 @@ class MasterDownloader:
             # Phase 5 needs skip_malware parameter
             if phase_num == 5:
                 downloader = downloader_class(str(self.base_dir), update=self.update, skip_malware=self.skip_malware)
+                results = downloader.run(live_confirmed=live_confirmed)
             else:
                 downloader = downloader_class(str(self.base_dir), update=self.update)
-            results = downloader.run()
+                results = downloader.run()
             
             elapsed = time.time() - start_time
             
@@ -162,12 +226,12 @@ class MasterDownloader:
         Returns:
             Dict: All results with timing
         """
-        print("=" * 80)
+        print(HR_EQ)
         print("🛡️  CYBERSECURITY DATASETS DOWNLOADER")
-        print("=" * 80)
-        print(f"📁 Base directory: {self.base_dir.absolute()}")
+        print(HR_EQ)
+        print(f"📁 Base directory: {self.base_dir_abs}")
         print(f"🕐 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 80)
+        print(HR_EQ)
         
         # Check dependencies
         if not self.check_dependencies():
@@ -176,13 +240,16 @@ class MasterDownloader:
         
         start_time = time.time()
         phase_results = []
-        
+
         # Run all phases
-        for phase_num in sorted(self.phases.keys()):
-            phase_name, downloader_class = self.phases[phase_num]
-            result = self.run_phase(phase_num, phase_name, downloader_class)
-            phase_results.append(result)
-        
+        if self.parallel_phases > 1:
+            phase_results = self._run_phases_parallel()
+        else:
+            for phase_num in sorted(self.phases.keys()):
+                phase_name, downloader_class = self.phases[phase_num]
+                result = self.run_phase(phase_num, phase_name, downloader_class)
+                phase_results.append(result)
+
         total_elapsed = time.time() - start_time
         
         # Compile results
@@ -190,40 +257,130 @@ class MasterDownloader:
             "download_date": datetime.now().isoformat(),
             "total_elapsed_seconds": round(total_elapsed, 2),
             "phases": phase_results,
-            "base_directory": str(self.base_dir.absolute())
+            "base_directory": str(self.base_dir_abs)
         }
         
         self.results = results
         
         return results
     
+    def _run_phases_parallel(self) -> List[Dict]:
+        """Run phases concurrently, buffering each phase's output.
+
+        Each phase is network-bound against independent remote hosts, so
+        overlapping them shortens wall-clock time toward the slowest
+        phase. Output is captured per phase and flushed in completion
+        order to keep the log readable.
+
+        Returns:
+            List[Dict]: Phase results sorted by phase number
+        """
+        print(f"\n⚡ Running phases with {self.parallel_phases} workers\n")
+
+        # The Phase 5 safety prompt is interactive - resolve it here,
+        # before output capture starts, so input() never blocks on a
+        # question printed into a hidden buffer
+        live_confirmed = (not self.skip_malware) and Phase5Downloader.show_safety_warning()
+
+        router = _ThreadStdoutRouter(sys.stdout)
+
+        def run_buffered(phase_num, phase_name, downloader_class):
+            buffer = io.StringIO()
+            router.register(buffer)
+            try:
+                result = self.run_phase(phase_num, phase_name, downloader_class,
+                                        live_confirmed=live_confirmed)
+            finally:
+                router.unregister()
+            return result, buffer.getvalue()
+
+        phase_results = []
+        sys.stdout = router
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel_phases) as executor:
+                futures = [
+                    executor.submit(run_buffered, phase_num, phase_name, downloader_class)
+                    for phase_num, (phase_name, downloader_class) in sorted(self.phases.items())
+                ]
+                for future in as_completed(futures):
+                    result, output = future.result()
+                    # The main thread has no buffer registered, so this
+                    # lands on the real stdout in completion order
+                    print(output, end="")
+                    phase_results.append(result)
+        finally:
+            sys.stdout = router._default
+
+        return sorted(phase_results, key=lambda r: r["phase"])
+
     def calculate_disk_usage(self) -> float:
         """Calculate total disk usage of downloaded datasets.
         
+        The result is cached so the summary printer and the results
+        writer do not each re-walk the same multi-GB tree.
+
         Returns:
             float: Total size in GB
         """
+        if self._disk_usage_cache is not None:
+            return self._disk_usage_cache
+
         try:
-            total_size = 0
-            for item in self.base_dir.rglob("*"):
-                if item.is_file():
-                    total_size += item.stat().st_size
-            
-            return round(total_size / (1024 ** 3), 2)  # Convert to GB
+            # Fast path: when the dataset dir is a dedicated mountpoint
+            # (e.g. --dir /data), the filesystem already knows its used
+            # bytes - one statvfs call instead of a per-file walk.
+            if os.path.ismount(self.base_dir):
+                st = os.statvfs(self.base_dir)
+                used = (st.f_blocks - st.f_bfree) * st.f_frsize
+                self._disk_usage_cache = round(used / (1024 ** 3), 2)
+                return self._disk_usage_cache
+
+            # Prefer GNU du when available - a hand-tuned C walker beats
+            # any Python loop on multi-GB trees. Fall back to the
+            # scandir walk if du is missing or fails.
+            du_size = self._disk_usage_via_du()
+            if du_size is not None:
+                self._disk_usage_cache = du_size
+                return self._disk_usage_cache
+
+            total_size = sum(_scandir_recursive(self.base_dir))
+
+            self._disk_usage_cache = round(total_size / (1024 ** 3), 2)  # Convert to GB
+            return self._disk_usage_cache
         except Exception as e:
             print(f"  ⚠️  Could not calculate disk usage: {e}")
             return 0.0
     
-    def print_final_summary(self, results: Dict, elapsed: float):
+    def _disk_usage_via_du(self) -> Optional[float]:
+        """Measure disk usage with the system du command.
+
+        Returns:
+            float: Size in GB, or None if du is unavailable or failed
+        """
+        try:
+            result = subprocess.run(
+                ["du", "-sb", str(self.base_dir)],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            if result.returncode == 0:
+                return round(int(result.stdout.split()[0]) / (1024 ** 3), 2)
+        except (FileNotFoundError, subprocess.TimeoutExpired, ValueError, IndexError):
+            pass
+        return None
+
+    def print_final_summary(self, results: Dict, elapsed: float, disk_usage: Optional[float] = None):
         """Display final summary of all downloads.
-        
+
         Args:
             results: Results dictionary
             elapsed: Total elapsed time in seconds
+            disk_usage: Precomputed disk usage in GB (computed if None)
         """
-        print("\n" + "=" * 80)
+        print("\n" + HR_EQ)
         print("🎉 FINAL SUMMARY")
-        print("=" * 80)
+        print(HR_EQ)
         
         successful_phases = sum(1 for p in results["phases"] if p["status"] == "success")
         total_phases = len(results["phases"])
@@ -232,7 +389,8 @@ class MasterDownloader:
         print(f"  Total Time: {elapsed / 60:.1f} minutes")
         
         # Calculate disk usage
-        disk_usage = self.calculate_disk_usage()
+        if disk_usage is None:
+            disk_usage = self.calculate_disk_usage()
         if disk_usage > 0:
             print(f"  Total Disk Usage: {disk_usage:.2f} GB")
         
@@ -243,22 +401,27 @@ class MasterDownloader:
             print(f"    {status_icon} Phase {phase['phase']}: {phase['name']} ({elapsed_min:.1f} min)")
         
         print(f"\n  📁 Dataset location: {results['base_directory']}")
-        print("=" * 80)
+        print(HR_EQ)
     
-    def save_results(self, results: Dict, elapsed: float):
+    def save_results(self, results: Dict, elapsed: float, disk_usage: Optional[float] = None):
         """Save download results to JSON file.
-        
+
         Args:
             results: Results dictionary
             elapsed: Total elapsed time
+            disk_usage: Precomputed disk usage in GB (computed if None)
         """
         output_file = self.base_dir / "download_summary.json"
-        
+
         # Add disk usage to results
-        results["disk_usage_gb"] = self.calculate_disk_usage()
-        
-        with open(output_file, "w") as f:
-            json.dump(results, f, indent=2)
+        results["disk_usage_gb"] = disk_usage if disk_usage is not None else self.calculate_disk_usage()
+
+        if orjson is not None:
+            with open(output_file, "wb") as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, "w") as f:
+                json.dump(results, f, indent=2)
         
         print(f"\n📄 Summary saved to: {output_file}")
 
@@ -303,11 +466,24 @@ Examples:
         action="store_true",
         help="Skip downloading live malware samples in Phase 5 (safer option)"
     )
-    
+
+    parser.add_argument(
+        "--parallel-phases",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Run up to N phases concurrently (default: 1, sequential)"
+    )
+
     args = parser.parse_args()
-    
+
+    # The phases report per-repo, per-page and per-dataset progress at
+    # INFO level; without a handler those records are dropped, so this
+    # entry point configures logging just like each phase's own main()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Create master downloader
-    master = MasterDownloader(args.dir, update=args.update, skip_malware=args.skip_malware)
+    master = MasterDownloader(args.dir, update=args.update, skip_malware=args.skip_malware, parallel_phases=args.parallel_phases)
     
     if args.update:
         print("🔄 Update mode enabled - will update existing repositories\n")
@@ -326,20 +502,23 @@ Examples:
             "download_date": datetime.now().isoformat(),
             "total_elapsed_seconds": round(elapsed, 2),
             "phases": [result],
-            "base_directory": str(master.base_dir.absolute())
+            "base_directory": str(master.base_dir_abs)
         }
         
-        master.print_final_summary(results, elapsed)
-        master.save_results(results, elapsed)
-        
+        # Compute disk usage once and share it between summary and save
+        disk_usage = master.calculate_disk_usage()
+        master.print_final_summary(results, elapsed, disk_usage=disk_usage)
+        master.save_results(results, elapsed, disk_usage=disk_usage)
+
     else:
         # Run all phases
         start_time = time.time()
         results = master.run_all()
         elapsed = time.time() - start_time
-        
-        master.print_final_summary(results, elapsed)
-        master.save_results(results, elapsed)
+
+        disk_usage = master.calculate_disk_usage()
+        master.print_final_summary(results, elapsed, disk_usage=disk_usage)
+        master.save_results(results, elapsed, disk_usage=disk_usage)
 
 
 if __name__ == "__main__":
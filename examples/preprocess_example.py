@@ -4,12 +4,316 @@ Complete working example for preprocessing cybersecurity datasets.
 This script demonstrates how to extract and format data from all phases.
 """
 
+import os
+import io
 import re
 import json
 import csv
+import mmap
+import functools
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
 from typing import List, Dict
 
+# Optional columnar CSV parser - much faster than the csv module on
+# the full ~45k-row ExploitDB index
+try:
+    import pyarrow.csv as pyarrow_csv
+except ImportError:
+    pyarrow_csv = None
+
+# Optional streaming JSON parser - keeps peak memory at one CVE entry
+# instead of a whole 100MB+ NVD feed
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Optional fast JSON encoder/decoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional zstd bindings - Phase 4 writes cve_<year>.ndjson.zst when
+# zstandard is installed, so reading those files back needs it too
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# Patterns compiled once at import - the per-file loops below call the
+# bound methods directly, skipping the re module's cache lookup.
+_SOLUTION_KW_RE = re.compile(r'solution|solve|exploit|walkthrough', re.IGNORECASE)
+_SIGMA_FIELDS_RE = re.compile(r'^(title|description):\s*(.+)$', re.MULTILINE)
+
+
+def _scan_yara_rules(content: str) -> List[tuple]:
+    """Scan YARA source for (rule_name, rule_body) pairs.
+
+    A single forward pass: find the ``rule `` keyword, take the
+    identifier after it, then walk a brace depth counter to the
+    matching close. Linear in the input where the old non-greedy
+    regex was worst-case quadratic, and the depth counter captures
+    full bodies instead of stopping at the first ``}`` inside a
+    nested block.
+
+    Args:
+        content: YARA file contents
+
+    Returns:
+        List of (rule_name, rule_body) tuples
+    """
+    rules = []
+    n = len(content)
+    i = 0
+    while True:
+        k = content.find('rule ', i)
+        if k < 0:
+            break
+        j = k + 5
+        while j < n and content[j] in ' \t\r\n':
+            j += 1
+        s = j
+        while j < n and (content[j].isalnum() or content[j] == '_'):
+            j += 1
+        name = content[s:j]
+        if not name:
+            i = k + 5
+            continue
+        m = j
+        while m < n and content[m] in ' \t\r\n':
+            m += 1
+        if m >= n or content[m] != '{':
+            i = j
+            continue
+        depth = 1
+        p = m + 1
+        while p < n and depth:
+            c = content[p]
+            if c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+            p += 1
+        if depth:
+            break  # unbalanced braces - ignore the trailing fragment
+        rules.append((name, content[m + 1:p - 1]))
+        i = p
+    return rules
+
+
+@functools.lru_cache(maxsize=512)
+def _exploit_instruction(platform: str, code_type: str) -> str:
+    """Return the instruction string for an ExploitDB row.
+
+    Memoized because the platform/type columns are heavily categorical
+    (~20 platforms), so identical rows reuse one string object instead
+    of formatting a new one per row.
+    """
+    return f"Describe the {platform} {code_type} exploit"
+
+
+@functools.lru_cache(maxsize=512)
+def _exploit_output_prefix(platform: str, code_type: str) -> str:
+    """Return the memoized output prefix for an ExploitDB row."""
+    return f"This is a {code_type} vulnerability affecting {platform}. "
+
+
+def _iter_files(root, suffixes):
+    """Yield paths of files under a tree whose names match a suffix.
+
+    Walks with os.scandir so file type checks come from the cached
+    DirEntry metadata, and yields plain strings - no Path object is
+    allocated per entry the way Path.rglob does.
+
+    Args:
+        root: Directory to walk (str or Path)
+        suffixes: Suffix string or tuple of suffixes to match
+
+    Yields:
+        str: Path of each matching file
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(suffixes):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _process_ctf_md(md_file) -> List[Dict]:
+    """Extract Q&A pairs from a single CTF writeup markdown file.
+
+    Module-level so it can run in a worker process.
+
+    Args:
+        md_file: Path to the markdown file
+
+    Returns:
+        List of instruction-output pairs
+    """
+    pairs = []
+    try:
+        # mmap the file instead of reading it into one big decoded
+        # string - the kernel pages bytes in on demand, and UTF-8
+        # decoding happens only on the small slices that are kept
+        with open(md_file, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return pairs
+            with mm:
+                # Split by headers with a single boundary scan - each
+                # section is recorded as (title bytes, start, end)
+                # offsets into the map, no per-line allocations
+                n = len(mm)
+                sections = []
+                title = None
+                body_start = 0
+                pos = 0
+                while pos <= n:
+                    nl = mm.find(b'\n', pos)
+                    end = n if nl < 0 else nl
+                    line = mm[pos:end]
+                    if line.lstrip().startswith(b'#'):
+                        if title is not None:
+                            sections.append((title, body_start, pos))
+                        title = line.lstrip(b'# ').strip()
+                        body_start = end + 1
+                    if nl < 0:
+                        break
+                    pos = end + 1
+                if title is not None:
+                    sections.append((title, body_start, n))
+
+                for title_b, s, e in sections:
+                    body = mm[s:e].strip()
+                    if not body or len(title_b) + len(body) < 100:
+                        continue
+
+                    title = title_b.decode('utf-8', 'ignore')
+
+                    # Create instruction pair for solution sections -
+                    # one case-insensitive regex pass over the short
+                    # title instead of four substring checks plus a
+                    # .lower() allocation
+                    if _SOLUTION_KW_RE.search(title):
+                        pairs.append({
+                            "instruction": f"Explain how to solve this CTF challenge: {title}",
+                            "input": "",
+                            "output": body[:2000].decode('utf-8', 'ignore'),
+                            "_type": "ctf"
+                        })
+
+                    # Extract code blocks with a plain find() scan -
+                    # linear in the section size with no regex
+                    # backtracking on malformed or unbalanced fences
+                    i = 0
+                    while True:
+                        cs = body.find(b'```', i)
+                        if cs < 0:
+                            break
+                        ce = body.find(b'```', cs + 3)
+                        if ce < 0:
+                            break
+                        clean_code = body[cs + 3:ce].strip()
+                        i = ce + 3
+                        if 50 < len(clean_code) < 1500:
+                            pairs.append({
+                                "instruction": "Analyze this CTF exploit code",
+                                "input": clean_code.decode('utf-8', 'ignore'),
+                                "output": f"This code is part of solving: {title}",
+                                "_type": "ctf"
+                            })
+
+    except Exception:
+        pass
+
+    return pairs
+
+
+def _process_yara_file(yara_file) -> List[Dict]:
+    """Extract rule pairs from a single YARA file.
+
+    Args:
+        yara_file: Path to the .yar/.yara file
+
+    Returns:
+        List of instruction-output pairs
+    """
+    pairs = []
+    try:
+        with open(yara_file, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+
+        # Extract rule names
+        rules = _scan_yara_rules(content)
+
+        for rule_name, rule_body in rules[:3]:  # Limit per file
+            if len(rule_body) < 50:
+                continue
+
+            full_rule = f"rule {rule_name} {{{rule_body[:1000]}}}"
+
+            pairs.append({
+                "instruction": f"Explain this YARA detection rule: {rule_name}",
+                "input": full_rule,
+                "output": f"This YARA rule detects {rule_name} by matching specific patterns.",
+                "_type": "yara"
+            })
+
+    except Exception:
+        pass
+
+    return pairs
+
+
+def _process_sigma_file(sigma_file) -> List[Dict]:
+    """Extract a rule pair from a single Sigma file.
+
+    Args:
+        sigma_file: Path to the .yml file
+
+    Returns:
+        List of instruction-output pairs
+    """
+    pairs = []
+    try:
+        with open(sigma_file, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+
+        # Simple YAML parsing - one pass picks up both fields, and they
+        # sit in the file's first lines so the scan window is bounded
+        fields = {
+            m.group(1): m.group(2).strip()
+            for m in _SIGMA_FIELDS_RE.finditer(content[:2048])
+        }
+
+        if "title" in fields:
+            pairs.append({
+                "instruction": f"Create a Sigma detection rule for: {fields['title']}",
+                "input": fields.get("description", ""),
+                "output": content[:1500],
+                "_type": "sigma"
+            })
+
+    except Exception:
+        pass
+
+    return pairs
+
 
 class DatasetPreprocessor:
     """Preprocessor for cybersecurity datasets."""
@@ -21,243 +325,255 @@ class DatasetPreprocessor:
             base_dir: Base directory containing downloaded datasets
         """
         self.base_dir = Path(base_dir)
-        self.all_pairs = []
-    
-    def extract_ctf_qa_pairs(self) -> List[Dict]:
+
+    def extract_ctf_qa_pairs(self):
         """Extract Q&A pairs from CTF writeup markdown files.
-        
-        Returns:
-            List of instruction-output pairs
+
+        Yields:
+            Dict: Instruction-output pairs
         """
         print("🔄 Processing CTF Writeups...")
-        pairs = []
-        
+        count = 0
+
         phase1_dir = self.base_dir / "phase1_ctf_bugbounty" / "ctf_writeups"
         if not phase1_dir.exists():
             print("  ⚠️  Phase 1 directory not found")
-            return pairs
-        
-        for md_file in phase1_dir.rglob("*.md"):
-            try:
-                with open(md_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Split by headers
-                sections = re.split(r'\n#+\s+', content)
-                
-                for section in sections:
-                    if not section.strip() or len(section) < 100:
-                        continue
-                    
-                    lines = section.split('\n', 1)
-                    if len(lines) < 2:
-                        continue
-                    
-                    title = lines[0].strip()
-                    body = lines[1].strip()
-                    
-                    # Create instruction pair for solution sections
-                    if any(kw in title.lower() for kw in ['solution', 'solve', 'exploit', 'walkthrough']):
-                        pairs.append({
-                            "instruction": f"Explain how to solve this CTF challenge: {title}",
-                            "input": "",
-                            "output": body[:2000]
-                        })
-                    
-                    # Extract code blocks
-                    code_blocks = re.findall(r'```(.*?)```', body, re.DOTALL)
-                    for code in code_blocks:
-                        clean_code = code.strip()
-                        if 50 < len(clean_code) < 1500:
-                            pairs.append({
-                                "instruction": "Analyze this CTF exploit code",
-                                "input": clean_code,
-                                "output": f"This code is part of solving: {title}"
-                            })
-            
-            except Exception as e:
-                continue
-        
-        print(f"  ✅ Extracted {len(pairs)} CTF pairs")
-        return pairs
-    
-    def extract_exploit_code_pairs(self) -> List[Dict]:
+            return
+
+        # Fan the per-file work out across processes - each file is
+        # independent, and chunksize amortizes the IPC overhead across
+        # many small writeups
+        with ProcessPoolExecutor() as ex:
+            for result in ex.map(_process_ctf_md, _iter_files(phase1_dir, ".md"), chunksize=16):
+                count += len(result)
+                yield from result
+
+        print(f"  ✅ Extracted {count} CTF pairs")
+
+    def extract_exploit_code_pairs(self):
         """Extract exploit code and descriptions from ExploitDB.
-        
-        Returns:
-            List of instruction-output pairs
+
+        Yields:
+            Dict: Instruction-output pairs
         """
         print("🔄 Processing Exploit Database...")
-        pairs = []
-        
+        count = 0
+
         exploitdb_dir = self.base_dir / "phase2_exploits_tools" / "exploitdb"
         if not exploitdb_dir.exists():
             print("  ⚠️  ExploitDB directory not found")
-            return pairs
-        
+            return
+
         csv_file = exploitdb_dir / "files.csv"
         if not csv_file.exists():
             print("  ⚠️  files.csv not found")
-            return pairs
-        
+            return
+
         try:
-            with open(csv_file, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                
-                for i, row in enumerate(reader):
-                    if i >= 1000:  # Limit for example
-                        break
-                    
-                    description = row.get('description', '').strip()
-                    code_type = row.get('type', '').strip()
-                    platform = row.get('platform', '').strip()
-                    
-                    if not description or len(description) < 20:
-                        continue
-                    
-                    pairs.append({
-                        "instruction": f"Describe the {platform} {code_type} exploit",
-                        "input": description,
-                        "output": f"This is a {code_type} vulnerability affecting {platform}. {description[:500]}"
-                    })
-        
+            for description, code_type, platform in islice(self._read_exploitdb_rows(csv_file), 1000):
+                description = (description or '').strip()
+                code_type = (code_type or '').strip()
+                platform = (platform or '').strip()
+
+                if not description or len(description) < 20:
+                    continue
+
+                count += 1
+                yield {
+                    "instruction": _exploit_instruction(platform, code_type),
+                    "input": description,
+                    "output": _exploit_output_prefix(platform, code_type) + description[:500],
+                    "_type": "exploit"
+                }
+
         except Exception as e:
             print(f"  ⚠️  Error reading CSV: {e}")
-        
-        print(f"  ✅ Extracted {len(pairs)} exploit pairs")
-        return pairs
+
+        print(f"  ✅ Extracted {count} exploit pairs")
     
-    def extract_yara_sigma_pairs(self) -> List[Dict]:
+    def _read_exploitdb_rows(self, csv_file: Path):
+        """Yield (description, type, platform) rows from files.csv.
+
+        Uses pyarrow's C parser when installed, falling back to the
+        stdlib csv module otherwise.
+
+        Args:
+            csv_file: Path to the ExploitDB files.csv
+
+        Yields:
+            Tuple of (description, type, platform) strings
+        """
+        if pyarrow_csv is not None:
+            table = pyarrow_csv.read_csv(
+                csv_file,
+                convert_options=pyarrow_csv.ConvertOptions(
+                    include_columns=['description', 'type', 'platform']
+                )
+            )
+            yield from zip(
+                table.column('description').to_pylist(),
+                table.column('type').to_pylist(),
+                table.column('platform').to_pylist()
+            )
+            return
+
+        with open(csv_file, 'r', encoding='utf-8', errors='ignore') as f:
+            for row in csv.DictReader(f):
+                yield row.get('description', ''), row.get('type', ''), row.get('platform', '')
+
+    def extract_yara_sigma_pairs(self):
         """Extract YARA and Sigma rules as training data.
-        
-        Returns:
-            List of instruction-output pairs
+
+        Yields:
+            Dict: Instruction-output pairs
         """
         print("🔄 Processing YARA & Sigma Rules...")
-        pairs = []
-        
+        count = 0
+
         # YARA rules
         yara_dir = self.base_dir / "phase3_yara_sigma" / "yara_rules"
         if yara_dir.exists():
-            for yara_file in list(yara_dir.rglob("*.yar*"))[:100]:  # Limit for example
-                try:
-                    with open(yara_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Extract rule names
-                    rules = re.findall(r'rule\s+(\w+)\s*\{(.*?)\}', content, re.DOTALL)
-                    
-                    for rule_name, rule_body in rules[:3]:  # Limit per file
-                        if len(rule_body) < 50:
-                            continue
-                        
-                        full_rule = f"rule {rule_name} {{{rule_body[:1000]}}}"
-                        
-                        pairs.append({
-                            "instruction": f"Explain this YARA detection rule: {rule_name}",
-                            "input": full_rule,
-                            "output": f"This YARA rule detects {rule_name} by matching specific patterns."
-                        })
-                
-                except Exception:
-                    continue
-        
+            yara_files = list(islice(_iter_files(yara_dir, (".yar", ".yara")), 100))  # Limit for example
+            with ProcessPoolExecutor() as ex:
+                for result in ex.map(_process_yara_file, yara_files, chunksize=16):
+                    count += len(result)
+                    yield from result
+
         # Sigma rules
         sigma_dir = self.base_dir / "phase3_yara_sigma" / "sigma_rules"
         if sigma_dir.exists():
-            for sigma_file in list(sigma_dir.rglob("*.yml"))[:100]:  # Limit for example
-                try:
-                    with open(sigma_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Simple YAML parsing
-                    title_match = re.search(r'title:\s*(.+)', content)
-                    desc_match = re.search(r'description:\s*(.+)', content)
-                    
-                    if title_match:
-                        title = title_match.group(1).strip()
-                        description = desc_match.group(1).strip() if desc_match else ""
-                        
-                        pairs.append({
-                            "instruction": f"Create a Sigma detection rule for: {title}",
-                            "input": description,
-                            "output": content[:1500]
-                        })
-                
-                except Exception:
-                    continue
-        
-        print(f"  ✅ Extracted {len(pairs)} rule pairs")
-        return pairs
+            sigma_files = list(islice(_iter_files(sigma_dir, ".yml"), 100))  # Limit for example
+            with ProcessPoolExecutor() as ex:
+                for result in ex.map(_process_sigma_file, sigma_files, chunksize=16):
+                    count += len(result)
+                    yield from result
+
+        print(f"  ✅ Extracted {count} rule pairs")
     
-    def extract_cve_pairs(self) -> List[Dict]:
+    def _iter_vulnerabilities(self, cve_file):
+        """Yield vulnerability entries from a downloaded CVE file.
+
+        Handles both Phase 4 layouts: the yearly feeds are NDJSON
+        (cve_<year>.ndjson, .ndjson.zst when zstandard is installed)
+        with one vulnerability per line, while cve_recent_modified.json
+        keeps the monolithic {"vulnerabilities": [...]} shape. The
+        monolithic path streams with ijson when installed so only one
+        entry is in memory at a time; both paths stop reading as soon
+        as the caller does.
+
+        Args:
+            cve_file: Path to a cve_* feed file (str or Path)
+
+        Yields:
+            Dict: One vulnerability entry at a time
+        """
+        name = os.path.basename(cve_file)
+        loads = orjson.loads if orjson is not None else json.loads
+
+        if ".ndjson" in name:
+            f = open(cve_file, 'rb')
+            if name.endswith('.zst'):
+                if zstd is None:
+                    raise RuntimeError(
+                        "zstandard not installed - cannot read " + name)
+                f = io.BufferedReader(zstd.ZstdDecompressor().stream_reader(f))
+            with f:
+                for line in f:
+                    if line.strip():
+                        yield loads(line)
+            return
+
+        if ijson is not None:
+            with open(cve_file, 'rb') as f:
+                yield from ijson.items(f, 'vulnerabilities.item')
+            return
+
+        if orjson is not None:
+            with open(cve_file, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(cve_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        yield from data.get('vulnerabilities', [])
+
+    def extract_cve_pairs(self):
         """Extract CVE data as Q&A pairs.
-        
-        Returns:
-            List of instruction-output pairs
+
+        Yields:
+            Dict: Instruction-output pairs
         """
         print("🔄 Processing CVE Database...")
-        pairs = []
-        
+        count = 0
+
         phase4_dir = self.base_dir / "phase4_cve_database"
         if not phase4_dir.exists():
             print("  ⚠️  Phase 4 directory not found")
-            return pairs
+            return
         
-        for cve_file in phase4_dir.glob("cve_*.json"):
+        # Flat listing - a single scandir pass beats glob's pattern
+        # machinery for the handful of yearly feed files. The yearly
+        # feeds are NDJSON (optionally zstd-compressed); the .meta.json
+        # sidecars and the resume cursor carry no entries and are
+        # skipped.
+        with os.scandir(phase4_dir) as it:
+            cve_files = [
+                e.path for e in it
+                if e.name.startswith("cve_")
+                and e.name.endswith((".json", ".ndjson", ".ndjson.zst"))
+                and not e.name.endswith(".meta.json")
+            ]
+
+        for cve_file in cve_files:
             try:
-                with open(cve_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                vulnerabilities = data.get('vulnerabilities', [])
-                
-                for i, vuln_item in enumerate(vulnerabilities):
-                    if i >= 500:  # Limit per file for example
-                        break
-                    
+                # Limit per file for example - islice keeps the cap
+                # check at C level and stops the underlying stream
+                for vuln_item in islice(self._iter_vulnerabilities(cve_file), 500):
                     cve = vuln_item.get('cve', {})
                     cve_id = cve.get('id', '')
                     
-                    # Get description
-                    descriptions = cve.get('descriptions', [])
-                    description = ''
-                    for desc in descriptions:
-                        if desc.get('lang') == 'en':
-                            description = desc.get('value', '')
-                            break
-                    
+                    # Get description - next() drives the short scan at
+                    # C level and stops on the first English entry
+                    description = next(
+                        (d.get('value', '') for d in cve.get('descriptions', [])
+                         if d.get('lang') == 'en'),
+                        ''
+                    )
+
                     if not description:
                         continue
-                    
-                    # Get severity
+
+                    # Get severity - no fallback list allocation when
+                    # neither CVSS key is present
                     metrics = cve.get('metrics', {})
-                    severity = 'Unknown'
-                    base_score = 'N/A'
-                    
-                    cvss_v3 = metrics.get('cvssMetricV31', []) or metrics.get('cvssMetricV30', [])
+                    cvss_v3 = metrics.get('cvssMetricV31') or metrics.get('cvssMetricV30')
                     if cvss_v3:
                         cvss_data = cvss_v3[0].get('cvssData', {})
                         severity = cvss_data.get('baseSeverity', 'Unknown')
                         base_score = str(cvss_data.get('baseScore', 'N/A'))
+                    else:
+                        severity = 'Unknown'
+                        base_score = 'N/A'
                     
-                    pairs.append({
+                    count += 2
+                    yield {
                         "instruction": f"Describe the vulnerability {cve_id}",
                         "input": "",
-                        "output": f"{cve_id} is a {severity} severity vulnerability (CVSS: {base_score}). {description[:800]}"
-                    })
-                    
-                    pairs.append({
+                        "output": f"{cve_id} is a {severity} severity vulnerability (CVSS: {base_score}). {description[:800]}",
+                        "_type": "cve"
+                    }
+
+                    yield {
                         "instruction": f"What is the CVSS score of {cve_id}?",
                         "input": description[:300],
-                        "output": f"The CVSS base score is {base_score} with {severity} severity."
-                    })
-            
+                        "output": f"The CVSS base score is {base_score} with {severity} severity.",
+                        "_type": "cve"
+                    }
+
             except Exception as e:
-                print(f"  ⚠️  Error reading {cve_file.name}: {e}")
+                print(f"  ⚠️  Error reading {os.path.basename(cve_file)}: {e}")
                 continue
-        
-        print(f"  ✅ Extracted {len(pairs)} CVE pairs")
-        return pairs
+
+        print(f"  ✅ Extracted {count} CVE pairs")
     
     def create_training_dataset(self, output_file: str = "training_data.jsonl"):
         """Create complete training dataset from all phases.
@@ -269,35 +585,54 @@ class DatasetPreprocessor:
         print("🛡️  CYBERSECURITY DATASET PREPROCESSING")
         print("=" * 80)
         print()
-        
-        # Extract from all phases
-        self.all_pairs.extend(self.extract_ctf_qa_pairs())
-        self.all_pairs.extend(self.extract_exploit_code_pairs())
-        self.all_pairs.extend(self.extract_yara_sigma_pairs())
-        self.all_pairs.extend(self.extract_cve_pairs())
-        
-        # Save to JSONL
+
+        # Chain the extractors into one lazy stream - pairs flow from
+        # each extractor straight into the file, so peak memory is one
+        # write batch rather than the whole dataset
+        pair_stream = chain(
+            self.extract_ctf_qa_pairs(),
+            self.extract_exploit_code_pairs(),
+            self.extract_yara_sigma_pairs(),
+            self.extract_cve_pairs()
+        )
+
+        total_pairs = 0
+        # Each extractor tags its pairs with _type at creation, so the
+        # stats are a Counter bump per pair - no substring heuristics
+        # over the instruction text. Seeded so every category appears
+        # in the stats file even when empty.
+        by_type = Counter({"ctf": 0, "exploit": 0, "yara": 0, "sigma": 0, "cve": 0})
+
+        # Write UTF-8 bytes in large joined chunks through a 1MB
+        # buffer - one write call per few thousand records, and no
+        # text-mode incremental encoder pass per line. orjson emits
+        # bytes natively; the stdlib fallback encodes each line once.
+        if orjson is not None:
+            dumps = orjson.dumps
+        else:
+            def dumps(pair):
+                return json.dumps(pair, ensure_ascii=False).encode('utf-8')
+
+        batch = []
+        with open(output_file, 'wb', buffering=1 << 20) as f:
+            for pair in pair_stream:
+                total_pairs += 1
+                by_type[pair.pop("_type", "unknown")] += 1
+                batch.append(dumps(pair))
+                if len(batch) >= 4096:
+                    f.write(b'\n'.join(batch) + b'\n')
+                    batch.clear()
+            if batch:
+                f.write(b'\n'.join(batch) + b'\n')
+
         print()
-        print(f"💾 Saving {len(self.all_pairs)} training pairs to {output_file}...")
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for pair in self.all_pairs:
-                f.write(json.dumps(pair, ensure_ascii=False) + '\n')
-        
-        print(f"✅ Successfully saved to {output_file}")
-        
-        # Generate statistics
+        print(f"✅ Successfully saved {total_pairs} training pairs to {output_file}")
+
         stats = {
-            "total_pairs": len(self.all_pairs),
+            "total_pairs": total_pairs,
             "output_file": output_file,
             "phases_processed": 4,
-            "by_type": {
-                "ctf": sum(1 for p in self.all_pairs if 'CTF' in p.get('instruction', '')),
-                "exploit": sum(1 for p in self.all_pairs if 'exploit' in p.get('instruction', '').lower()),
-                "yara": sum(1 for p in self.all_pairs if 'YARA' in p.get('instruction', '')),
-                "sigma": sum(1 for p in self.all_pairs if 'Sigma' in p.get('instruction', '')),
-                "cve": sum(1 for p in self.all_pairs if 'CVE' in p.get('instruction', ''))
-            }
+            "by_type": dict(by_type)
         }
         
         stats_file = "training_stats.json"
@@ -317,8 +652,8 @@ class DatasetPreprocessor:
         print(f"  Sigma Pairs: {stats['by_type']['sigma']}")
         print(f"  CVE Pairs: {stats['by_type']['cve']}")
         print("=" * 80)
-        
-        return self.all_pairs
+
+        return stats
 
 
 def main():
@@ -5,11 +5,504 @@ Demonstrates how to preprocess Phase 5 datasets for Llama 3 fine-tuning.
 """
 
 import json
+import logging
+import mmap
+import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import hashlib
 
+# Optional non-cryptographic hash - the sample IDs only need to be
+# unique, and xxhash is several times faster than hashlib digests
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Optional fast JSON encoder - emits UTF-8 bytes natively
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Loop-level diagnostics go through logging so a noisy dataset does
+# not stall the workers on per-file stdout flushes; warnings are off
+# unless the root logger is configured below INFO.
+logger = logging.getLogger(__name__)
+
+# Patterns compiled once at import so the re module's per-call cache
+# lookup is skipped in the extraction loops below.
+_HEADER_RE = re.compile(r'(?m)^#+[ \t]*(.+?)[ \t]*$')
+# Bytes twin of _HEADER_RE for scanning memory-mapped files without
+# decoding them first
+_HEADER_B_RE = re.compile(rb'(?m)^#+[ \t]*(.+?)[ \t]*$')
+# Lines that are exactly one URL, matched on raw bytes so phishing
+# lists can be scanned without decoding or splitting them
+_URL_LINE_RE = re.compile(rb'(?m)^(https?://\S+)[ \t\r]*$')
+# All phishing indicators folded into one alternation so a URL is
+# traversed once; lastgroup tells which detector fired
+_PHISH_DETECT_RE = re.compile(
+    r'(?P<ip>\d{1,3}(?:\.\d{1,3}){3})'
+    r'|(?P<kw>login|secure|account|verify)'
+    r'|(?P<hy>-)',
+    re.IGNORECASE
+)
+# Case-insensitive detectors - searching the original content avoids
+# allocating a full lowered copy of each file just for a few checks
+_ANDROID_RE = re.compile(r'android', re.IGNORECASE)
+_IOS_RE = re.compile(r'ios', re.IGNORECASE)
+_AWS_RE = re.compile(r'aws|amazon', re.IGNORECASE)
+_AZURE_RE = re.compile(r'azure|microsoft', re.IGNORECASE)
+_GCP_RE = re.compile(r'gcp|google cloud', re.IGNORECASE)
+_TECH_RE = re.compile(
+    r'rop|buffer overflow|heap|stack|format string|use after free',
+    re.IGNORECASE
+)
+_BINEXPL_GATE = re.compile(r'rop|buffer overflow|heap|stack|pwn', re.IGNORECASE)
+_TECHNIQUES = {
+    "rop": "Return-Oriented Programming",
+    "buffer overflow": "Buffer Overflow",
+    "heap": "Heap Exploitation",
+    "stack": "Stack Overflow",
+    "format string": "Format String",
+    "use after free": "Use-After-Free",
+}
+
+
+# Helper functions live at module level so the per-file workers below
+# are picklable into ProcessPoolExecutor worker processes.
+
+def _iter_files(root, suffixes):
+    """Yield paths of files under a tree whose names match a suffix.
+
+    Walks with os.scandir so type checks come from cached DirEntry
+    metadata and yields plain strings - no Path object per entry the
+    way Path.rglob allocates, and the strings pickle cheaply into the
+    worker processes.
+
+    Args:
+        root: Directory to walk (str or Path)
+        suffixes: Suffix string or tuple of suffixes to match
+
+    Yields:
+        str: Path of each matching file
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(suffixes):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _make_sample(
+    instruction: str,
+    input_text: str,
+    output_text: str,
+    category: str,
+    metadata: Optional[Dict] = None
+) -> Dict:
+    """Create a single instruction-tuning sample.
+
+    Args:
+        instruction: Task instruction
+        input_text: Input context
+        output_text: Expected output
+        category: Dataset category
+        metadata: Optional metadata
+
+    Returns:
+        Dict: Formatted instruction sample
+    """
+    # Generate unique ID - fed part by part so no concatenated
+    # instruction+input+output string is allocated per sample.
+    # xxhash when available, BLAKE2b-128 otherwise; both beat MD5
+    # and the IDs are not security-sensitive.
+    if xxhash is not None:
+        h = xxhash.xxh128()
+    else:
+        h = hashlib.blake2b(digest_size=16)
+    h.update(instruction.encode('utf-8'))
+    h.update(input_text.encode('utf-8'))
+    h.update(output_text.encode('utf-8'))
+
+    # One dict literal at final size - no post-hoc key insertions
+    # forcing a resize in the per-sample hot path
+    sample = {
+        "instruction": instruction,
+        "input": input_text,
+        "output": output_text,
+        "category": category,
+        "id": h.hexdigest(),
+    }
+    if metadata:
+        sample["metadata"] = metadata
+
+    return sample
+
+
+def _read_capped(path, cap: int = 8192, min_bytes: int = 100) -> Optional[str]:
+    """Read at most ``cap`` bytes of a text file.
+
+    The size check skips tiny files on stat metadata alone, and the
+    capped read keeps huge reports out of memory - the extractors
+    downstream never keep more than ~2000 chars anyway.
+
+    Args:
+        path: File to read (str or Path)
+        cap: Maximum number of bytes to read
+        min_bytes: Files smaller than this return None unread
+
+    Returns:
+        Decoded content, or None if the file is too small/unreadable
+    """
+    try:
+        if os.stat(path).st_size < min_bytes:
+            return None
+        with open(path, 'rb') as f:
+            return f.read(cap).decode('utf-8', errors='ignore')
+    except OSError:
+        return None
+
+
+def _mmap_markdown_sections(path, min_bytes: int = 100,
+                            body_cap: int = 4096) -> Optional[Dict[str, str]]:
+    """Extract markdown sections straight from a memory-mapped file.
+
+    The header regex runs on the mapped bytes, so the file is never
+    decoded wholesale - only the header names and at most ``body_cap``
+    bytes of each body are decoded, and unread pages are never pulled
+    off disk. Files below ``min_bytes`` are skipped on the map length
+    alone.
+
+    Args:
+        path: Markdown file to scan (str or Path)
+        min_bytes: Files smaller than this return None unread
+        body_cap: Maximum bytes decoded per section body
+
+    Returns:
+        Section name to body mapping, or None if the file is too
+        small/unreadable
+    """
+    try:
+        with open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < min_bytes:
+                return None
+
+            sections = {}
+            name = None
+            body_start = 0
+            for m in _HEADER_B_RE.finditer(mm):
+                if name is not None:
+                    end = min(m.start(), body_start + body_cap)
+                    body = mm[body_start:end]
+                    sections[name] = body.decode('utf-8', 'ignore').strip()
+                header = m.group(1).decode('utf-8', 'ignore')
+                name = header.strip('#').strip().lower()
+                body_start = m.end()
+            if name is not None:
+                end = min(len(mm), body_start + body_cap)
+                body = mm[body_start:end]
+                sections[name] = body.decode('utf-8', 'ignore').strip()
+            return sections
+    except (OSError, ValueError):
+        return None
+
+
+def _extract_markdown_sections(content: str) -> Dict[str, str]:
+    """Extract sections from markdown content.
+
+    One regex split yields [preamble, header, body, header, body, ...],
+    so the per-line Python loop and its join-per-section go away - the
+    line scanning happens inside the re engine.
+    """
+    parts = _HEADER_RE.split(content)
+    return {
+        header.strip('#').strip().lower(): body.strip()
+        for header, body in zip(parts[1::2], parts[2::2])
+    }
+
+
+def _extract_summary(content: str, max_length: int = 500) -> str:
+    """Extract summary from content.
+
+    A running length stands in for the old join-per-line check, so the
+    lines are joined exactly once instead of once per kept line.
+    """
+    summary = []
+    length = 0
+
+    for line in content.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            summary.append(line)
+            length += len(line) + 1  # +1 for the joining space
+            if length > max_length:
+                break
+
+    return ' '.join(summary)[:max_length]
+
+
+def _extract_details(content: str, max_length: int = 1500) -> str:
+    """Extract detailed information."""
+    # Skip first few lines (usually title/summary)
+    lines = content.split('\n')[3:]
+    details = ' '.join([l.strip() for l in lines if l.strip()])
+    return details[:max_length]
+
+
+def _extract_analysis(content: str, max_length: int = 2000,
+                      sections: Optional[Dict[str, str]] = None) -> str:
+    """Extract analysis section.
+
+    Callers that already parsed the sections pass them in so the file
+    is not split a second time.
+    """
+    if sections is None:
+        sections = _extract_markdown_sections(content)
+
+    # Look for analysis-related sections
+    for key in ['analysis', 'technical details', 'indicators', 'ttps']:
+        if key in sections:
+            return sections[key][:max_length]
+
+    # Return general content
+    return _extract_details(content, max_length)
+
+
+def _analyze_phishing_url(url: str) -> str:
+    """Generate phishing analysis for URL."""
+    # Tally all indicators in a single pass over the URL
+    ips = keywords = hyphens = 0
+    for m in _PHISH_DETECT_RE.finditer(url):
+        group = m.lastgroup
+        if group == 'hy':
+            hyphens += 1
+        elif group == 'kw':
+            keywords += 1
+        else:
+            ips += 1
+
+    indicators = []
+
+    if ips:
+        indicators.append("Uses IP address instead of domain name")
+
+    if hyphens > 3:
+        indicators.append("Excessive hyphens in domain")
+
+    if keywords:
+        indicators.append("Contains common phishing keywords")
+
+    if len(url) > 100:
+        indicators.append("Unusually long URL")
+
+    if indicators:
+        return f"This appears to be a phishing URL. Red flags: {'; '.join(indicators)}."
+    else:
+        return "This URL shows potential phishing characteristics and should be investigated."
+
+
+def _detect_platform(content: str) -> str:
+    """Detect mobile platform."""
+    android = _ANDROID_RE.search(content) is not None
+    ios = _IOS_RE.search(content) is not None
+    if android and ios:
+        return "cross-platform"
+    elif android:
+        return "android"
+    elif ios:
+        return "ios"
+    return "unknown"
+
+
+def _detect_cloud_platform(content: str) -> Optional[str]:
+    """Detect cloud platform."""
+    if _AWS_RE.search(content):
+        return "AWS"
+    elif _AZURE_RE.search(content):
+        return "Azure"
+    elif _GCP_RE.search(content):
+        return "GCP"
+    return None
+
+
+def _extract_apt_name(filename: str) -> str:
+    """Extract APT group name from filename."""
+    # Simple extraction - improve based on actual filenames
+    name = filename.replace('.md', '').replace('_', ' ').title()
+    return name
+
+
+def _extract_technique(content: str) -> str:
+    """Extract exploitation technique."""
+    # One alternation pass finds the first technique mention; the dict
+    # maps the lowered match back to its display name
+    m = _TECH_RE.search(content)
+    if m:
+        return _TECHNIQUES[m.group(0).lower()]
+    return "General Binary Exploitation"
+
+
+# Per-file workers - each takes one path, returns a list of samples
+
+def _process_malware_md(md_file: str) -> List[Dict]:
+    """Process one malware analysis markdown file."""
+    samples = []
+    try:
+        # This worker only keeps section bodies, so the file is
+        # scanned in place - no full-file read or decode
+        sections = _mmap_markdown_sections(md_file, min_bytes=100)
+        if not sections:
+            return samples
+
+        # Create Q&A pairs
+        if "description" in sections and "analysis" in sections:
+            samples.append(_make_sample(
+                instruction="Analyze this malware and provide detailed insights.",
+                input_text=sections["description"][:1000],
+                output_text=sections["analysis"][:2000],
+                category="malware_analysis",
+                metadata={"source_file": os.path.basename(md_file)}
+            ))
+    except Exception as e:
+        logger.debug("Skipping malware file %s: %s", md_file, e)
+    return samples
+
+
+def _process_phishing_txt(txt_file: str) -> List[Dict]:
+    """Process one phishing URL list file."""
+    samples = []
+    try:
+        with open(txt_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Scan the mapped bytes for URL lines and stop at the
+            # first 100 - the file is never decoded wholesale and no
+            # line list is materialized, so a multi-million-line list
+            # costs only the pages actually touched
+            for m in islice(_URL_LINE_RE.finditer(mm), 100):
+                url = m.group(1).decode('ascii', 'ignore')
+                samples.append(_make_sample(
+                    instruction="Is this URL a phishing attempt? Explain your reasoning.",
+                    input_text=url,
+                    output_text=_analyze_phishing_url(url),
+                    category="phishing_detection"
+                ))
+    except Exception as e:
+        logger.debug("Skipping phishing file %s: %s", txt_file, e)
+    return samples
+
+
+def _process_mobile_md(md_file: str) -> List[Dict]:
+    """Process one mobile security markdown file."""
+    samples = []
+    try:
+        content = _read_capped(md_file, min_bytes=100)
+        if content is None:
+            return samples
+
+        # Extract Android/iOS specific content
+        if "Android" in content or "iOS" in content:
+            samples.append(_make_sample(
+                instruction="Explain this mobile security vulnerability.",
+                input_text=_extract_summary(content, max_length=500),
+                output_text=_extract_details(content, max_length=1500),
+                category="mobile_security",
+                metadata={"platform": _detect_platform(content)}
+            ))
+    except Exception as e:
+        logger.debug("Skipping mobile file %s: %s", md_file, e)
+    return samples
+
+
+def _process_cloud_readme(readme: str) -> List[Dict]:
+    """Process one cloud security README."""
+    samples = []
+    try:
+        with open(readme, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+
+        # Extract cloud platform
+        platform = _detect_cloud_platform(content)
+
+        if platform:
+            sections = _extract_markdown_sections(content)
+
+            for section_name, section_content in sections.items():
+                if len(section_content) > 200:
+                    samples.append(_make_sample(
+                        instruction=f"Explain this {platform} security concept.",
+                        input_text=section_name,
+                        output_text=section_content[:1500],
+                        category="cloud_security",
+                        metadata={"platform": platform}
+                    ))
+    except Exception as e:
+        logger.debug("Skipping cloud README %s: %s", readme, e)
+    return samples
+
+
+def _process_apt_md(file: str) -> List[Dict]:
+    """Process one APT intelligence markdown file."""
+    samples = []
+    try:
+        content = _read_capped(file, min_bytes=200)
+        if content is None:
+            return samples
+
+        sections = _extract_markdown_sections(content)
+
+        # Create threat intelligence samples
+        if sections:
+            samples.append(_make_sample(
+                instruction="Analyze this APT campaign and provide threat intelligence.",
+                input_text=_extract_summary(content, max_length=800),
+                output_text=_extract_analysis(content, max_length=2000,
+                                              sections=sections),
+                category="apt_intelligence",
+                metadata={"apt_group": _extract_apt_name(os.path.basename(file))}
+            ))
+    except Exception as e:
+        logger.debug("Skipping APT file %s: %s", file, e)
+    return samples
+
+
+def _process_binary_md(md_file: str) -> List[Dict]:
+    """Process one binary exploitation markdown file."""
+    samples = []
+    try:
+        content = _read_capped(md_file, min_bytes=150)
+        if content is None:
+            return samples
+
+        # Extract exploitation techniques - one alternation pass, no
+        # lowered copy of the file
+        if _BINEXPL_GATE.search(content):
+            samples.append(_make_sample(
+                instruction="Explain this binary exploitation technique.",
+                input_text=_extract_summary(content, max_length=600),
+                output_text=_extract_details(content, max_length=1800),
+                category="binary_exploitation",
+                metadata={"technique": _extract_technique(content)}
+            ))
+    except Exception as e:
+        logger.debug("Skipping binary exploitation file %s: %s", md_file, e)
+    return samples
+
 
 class Phase5Preprocessor:
     """Preprocessor for Phase 5 advanced threats datasets."""
@@ -24,501 +517,330 @@ class Phase5Preprocessor:
         self.phase5_dir = self.base_dir / "phase5_advanced_threats"
         self.output_dir = Path("./processed_phase5")
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.processed_samples = []
-    
-    def create_instruction_sample(
-        self, 
-        instruction: str, 
-        input_text: str, 
-        output_text: str,
-        category: str,
-        metadata: Optional[Dict] = None
-    ) -> Dict:
-        """Create a single instruction-tuning sample.
-        
+
+    def _map_files(self, worker, files, chunksize: int = 32) -> Iterator[Dict]:
+        """Fan per-file work out across worker processes.
+
         Args:
-            instruction: Task instruction
-            input_text: Input context
-            output_text: Expected output
-            category: Dataset category
-            metadata: Optional metadata
-        
-        Returns:
-            Dict: Formatted instruction sample
+            worker: Module-level function taking one path string
+            files: Iterable of file paths
+            chunksize: Paths per IPC batch, amortizing pickling cost
+
+        Yields:
+            Dict: Samples from each file as its result arrives
         """
-        sample = {
-            "instruction": instruction,
-            "input": input_text,
-            "output": output_text,
-            "category": category,
-        }
-        
-        if metadata:
-            sample["metadata"] = metadata
-        
-        # Generate unique ID
-        sample_str = f"{instruction}{input_text}{output_text}"
-        sample["id"] = hashlib.md5(sample_str.encode()).hexdigest()
-        
-        return sample
-    
-    def process_malware_analysis(self) -> List[Dict]:
+        with ProcessPoolExecutor() as ex:
+            for result in ex.map(worker, files, chunksize=chunksize):
+                yield from result
+
+    def process_malware_analysis(self) -> Iterator[Dict]:
         """Process malware analysis repositories.
-        
-        Returns:
-            List of instruction samples
+
+        Yields:
+            Dict: Instruction samples
         """
         print("🦠 Processing malware analysis data...")
-        samples = []
-        
+
         malware_dir = self.phase5_dir / "malware_analysis"
         if not malware_dir.exists():
             print("  ⚠️  Malware directory not found")
-            return samples
-        
+            return
+
         # Example: Process malware analysis markdown files
-        for md_file in malware_dir.rglob("*.md"):
-            try:
-                content = md_file.read_text(encoding='utf-8', errors='ignore')
-                
-                # Skip if too short
-                if len(content) < 100:
-                    continue
-                
-                # Extract sections
-                sections = self._extract_markdown_sections(content)
-                
-                # Create Q&A pairs
-                if "description" in sections and "analysis" in sections:
-                    sample = self.create_instruction_sample(
-                        instruction="Analyze this malware and provide detailed insights.",
-                        input_text=sections["description"][:1000],
-                        output_text=sections["analysis"][:2000],
-                        category="malware_analysis",
-                        metadata={"source_file": str(md_file.name)}
-                    )
-                    samples.append(sample)
-                
-            except Exception as e:
-                print(f"  ⚠️  Error processing {md_file}: {e}")
-                continue
-        
-        print(f"  ✅ Processed {len(samples)} malware analysis samples")
-        return samples
-    
-    def process_phishing_data(self) -> List[Dict]:
+        count = 0
+        for sample in self._map_files(
+            _process_malware_md, _iter_files(malware_dir, ".md")
+        ):
+            count += 1
+            yield sample
+
+        print(f"  ✅ Processed {count} malware analysis samples")
+
+    def process_phishing_data(self) -> Iterator[Dict]:
         """Process phishing and social engineering data.
-        
-        Returns:
-            List of instruction samples
+
+        Yields:
+            Dict: Instruction samples
         """
         print("🎣 Processing phishing data...")
-        samples = []
-        
+        count = 0
+
         phishing_dir = self.phase5_dir / "phishing_social_eng"
         if not phishing_dir.exists():
             print("  ⚠️  Phishing directory not found")
-            return samples
-        
+            return
+
         # Process phishing database
         phishing_db = phishing_dir / "phishing_database"
         if phishing_db.exists():
             # Look for phishing URLs or email samples
-            for txt_file in phishing_db.rglob("*.txt"):
-                try:
-                    content = txt_file.read_text(encoding='utf-8', errors='ignore')
-                    lines = content.strip().split('\n')
-                    
-                    for line in lines[:100]:  # Process first 100
-                        if line.strip() and self._is_url(line):
-                            sample = self.create_instruction_sample(
-                                instruction="Is this URL a phishing attempt? Explain your reasoning.",
-                                input_text=line.strip(),
-                                output_text=self._analyze_phishing_url(line.strip()),
-                                category="phishing_detection"
-                            )
-                            samples.append(sample)
-                            
-                except Exception as e:
-                    continue
-        
-        print(f"  ✅ Processed {len(samples)} phishing samples")
-        return samples
-    
-    def process_mobile_security(self) -> List[Dict]:
+            for sample in self._map_files(
+                _process_phishing_txt, _iter_files(phishing_db, ".txt")
+            ):
+                count += 1
+                yield sample
+
+        print(f"  ✅ Processed {count} phishing samples")
+
+    def process_mobile_security(self) -> Iterator[Dict]:
         """Process mobile security data.
-        
-        Returns:
-            List of instruction samples
+
+        Yields:
+            Dict: Instruction samples
         """
         print("📱 Processing mobile security data...")
-        samples = []
-        
+
         mobile_dir = self.phase5_dir / "mobile_security"
         if not mobile_dir.exists():
             print("  ⚠️  Mobile directory not found")
-            return samples
-        
+            return
+
         # Process mobile vulnerability descriptions
-        for md_file in mobile_dir.rglob("*.md"):
-            try:
-                content = md_file.read_text(encoding='utf-8', errors='ignore')
-                
-                if len(content) < 100:
-                    continue
-                
-                # Extract Android/iOS specific content
-                if "Android" in content or "iOS" in content:
-                    # Create learning samples
-                    sample = self.create_instruction_sample(
-                        instruction="Explain this mobile security vulnerability.",
-                        input_text=self._extract_summary(content, max_length=500),
-                        output_text=self._extract_details(content, max_length=1500),
-                        category="mobile_security",
-                        metadata={"platform": self._detect_platform(content)}
-                    )
-                    samples.append(sample)
-                    
-            except Exception as e:
-                continue
-        
-        print(f"  ✅ Processed {len(samples)} mobile security samples")
-        return samples
-    
-    def process_cloud_security(self) -> List[Dict]:
+        count = 0
+        for sample in self._map_files(
+            _process_mobile_md, _iter_files(mobile_dir, ".md")
+        ):
+            count += 1
+            yield sample
+
+        print(f"  ✅ Processed {count} mobile security samples")
+
+    def process_cloud_security(self) -> Iterator[Dict]:
         """Process cloud security data.
-        
-        Returns:
-            List of instruction samples
+
+        Yields:
+            Dict: Instruction samples
         """
         print("☁️  Processing cloud security data...")
-        samples = []
-        
+
         cloud_dir = self.phase5_dir / "cloud_security"
         if not cloud_dir.exists():
             print("  ⚠️  Cloud directory not found")
-            return samples
-        
+            return
+
         # Process cloud security tools and vulnerabilities
-        for readme in cloud_dir.rglob("README.md"):
-            try:
-                content = readme.read_text(encoding='utf-8', errors='ignore')
-                
-                # Extract cloud platform
-                platform = self._detect_cloud_platform(content)
-                
-                if platform:
-                    sections = self._extract_markdown_sections(content)
-                    
-                    if sections:
-                        for section_name, section_content in sections.items():
-                            if len(section_content) > 200:
-                                sample = self.create_instruction_sample(
-                                    instruction=f"Explain this {platform} security concept.",
-                                    input_text=section_name,
-                                    output_text=section_content[:1500],
-                                    category="cloud_security",
-                                    metadata={"platform": platform}
-                                )
-                                samples.append(sample)
-                                
-            except Exception as e:
-                continue
-        
-        print(f"  ✅ Processed {len(samples)} cloud security samples")
-        return samples
-    
-    def process_apt_intelligence(self) -> List[Dict]:
+        count = 0
+        for sample in self._map_files(
+            _process_cloud_readme, _iter_files(cloud_dir, "README.md")
+        ):
+            count += 1
+            yield sample
+
+        print(f"  ✅ Processed {count} cloud security samples")
+
+    def process_apt_intelligence(self) -> Iterator[Dict]:
         """Process APT and threat intelligence data.
-        
-        Returns:
-            List of instruction samples
+
+        Yields:
+            Dict: Instruction samples
         """
         print("🎯 Processing APT intelligence...")
-        samples = []
-        
+
         apt_dir = self.phase5_dir / "apt_intelligence"
         if not apt_dir.exists():
             print("  ⚠️  APT directory not found")
-            return samples
-        
+            return
+
         # Process APT notes and reports
-        for file in apt_dir.rglob("*.md"):
-            try:
-                content = file.read_text(encoding='utf-8', errors='ignore')
-                
-                if len(content) < 200:
-                    continue
-                
-                # Extract APT information
-                sections = self._extract_markdown_sections(content)
-                
-                # Create threat intelligence samples
-                if sections:
-                    sample = self.create_instruction_sample(
-                        instruction="Analyze this APT campaign and provide threat intelligence.",
-                        input_text=self._extract_summary(content, max_length=800),
-                        output_text=self._extract_analysis(content, max_length=2000),
-                        category="apt_intelligence",
-                        metadata={"apt_group": self._extract_apt_name(file.name)}
-                    )
-                    samples.append(sample)
-                    
-            except Exception as e:
-                continue
-        
-        print(f"  ✅ Processed {len(samples)} APT intelligence samples")
-        return samples
-    
-    def process_binary_exploitation(self) -> List[Dict]:
+        count = 0
+        for sample in self._map_files(
+            _process_apt_md, _iter_files(apt_dir, ".md")
+        ):
+            count += 1
+            yield sample
+
+        print(f"  ✅ Processed {count} APT intelligence samples")
+
+    def process_binary_exploitation(self) -> Iterator[Dict]:
         """Process binary exploitation data.
-        
-        Returns:
-            List of instruction samples
+
+        Yields:
+            Dict: Instruction samples
         """
         print("💾 Processing binary exploitation data...")
-        samples = []
-        
+
         binary_dir = self.phase5_dir / "binary_exploitation"
         if not binary_dir.exists():
             print("  ⚠️  Binary exploitation directory not found")
-            return samples
-        
+            return
+
         # Process exploitation techniques
-        for md_file in binary_dir.rglob("*.md"):
-            try:
-                content = md_file.read_text(encoding='utf-8', errors='ignore')
-                
-                if len(content) < 150:
-                    continue
-                
-                # Extract exploitation techniques
-                if any(keyword in content.lower() for keyword in 
-                       ["rop", "buffer overflow", "heap", "stack", "pwn"]):
-                    
-                    sample = self.create_instruction_sample(
-                        instruction="Explain this binary exploitation technique.",
-                        input_text=self._extract_summary(content, max_length=600),
-                        output_text=self._extract_details(content, max_length=1800),
-                        category="binary_exploitation",
-                        metadata={"technique": self._extract_technique(content)}
-                    )
-                    samples.append(sample)
-                    
-            except Exception as e:
-                continue
-        
-        print(f"  ✅ Processed {len(samples)} binary exploitation samples")
-        return samples
-    
-    # Helper methods
-    
-    def _extract_markdown_sections(self, content: str) -> Dict[str, str]:
-        """Extract sections from markdown content."""
-        sections = {}
-        current_section = None
-        current_content = []
-        
-        for line in content.split('\n'):
-            if line.startswith('#'):
-                if current_section:
-                    sections[current_section] = '\n'.join(current_content).strip()
-                current_section = line.strip('#').strip().lower()
-                current_content = []
-            else:
-                current_content.append(line)
-        
-        if current_section:
-            sections[current_section] = '\n'.join(current_content).strip()
-        
-        return sections
-    
-    def _extract_summary(self, content: str, max_length: int = 500) -> str:
-        """Extract summary from content."""
-        lines = content.split('\n')
-        summary = []
-        
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                summary.append(line)
-                if len(' '.join(summary)) > max_length:
-                    break
-        
-        return ' '.join(summary)[:max_length]
-    
-    def _extract_details(self, content: str, max_length: int = 1500) -> str:
-        """Extract detailed information."""
-        # Skip first few lines (usually title/summary)
-        lines = content.split('\n')[3:]
-        details = ' '.join([l.strip() for l in lines if l.strip()])
-        return details[:max_length]
-    
-    def _extract_analysis(self, content: str, max_length: int = 2000) -> str:
-        """Extract analysis section."""
-        sections = self._extract_markdown_sections(content)
-        
-        # Look for analysis-related sections
-        for key in ['analysis', 'technical details', 'indicators', 'ttps']:
-            if key in sections:
-                return sections[key][:max_length]
-        
-        # Return general content
-        return self._extract_details(content, max_length)
-    
-    def _is_url(self, text: str) -> bool:
-        """Check if text is a URL."""
-        url_pattern = r'https?://[^\s]+'
-        return bool(re.match(url_pattern, text))
-    
-    def _analyze_phishing_url(self, url: str) -> str:
-        """Generate phishing analysis for URL."""
-        indicators = []
-        
-        if re.search(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', url):
-            indicators.append("Uses IP address instead of domain name")
-        
-        if url.count('-') > 3:
-            indicators.append("Excessive hyphens in domain")
-        
-        if any(word in url.lower() for word in ['login', 'secure', 'account', 'verify']):
-            indicators.append("Contains common phishing keywords")
-        
-        if len(url) > 100:
-            indicators.append("Unusually long URL")
-        
-        if indicators:
-            return f"This appears to be a phishing URL. Red flags: {'; '.join(indicators)}."
-        else:
-            return "This URL shows potential phishing characteristics and should be investigated."
-    
-    def _detect_platform(self, content: str) -> str:
-        """Detect mobile platform."""
-        content_lower = content.lower()
-        if "android" in content_lower and "ios" in content_lower:
-            return "cross-platform"
-        elif "android" in content_lower:
-            return "android"
-        elif "ios" in content_lower:
-            return "ios"
-        return "unknown"
-    
-    def _detect_cloud_platform(self, content: str) -> Optional[str]:
-        """Detect cloud platform."""
-        content_lower = content.lower()
-        if "aws" in content_lower or "amazon" in content_lower:
-            return "AWS"
-        elif "azure" in content_lower or "microsoft" in content_lower:
-            return "Azure"
-        elif "gcp" in content_lower or "google cloud" in content_lower:
-            return "GCP"
-        return None
-    
-    def _extract_apt_name(self, filename: str) -> str:
-        """Extract APT group name from filename."""
-        # Simple extraction - improve based on actual filenames
-        name = filename.replace('.md', '').replace('_', ' ').title()
-        return name
-    
-    def _extract_technique(self, content: str) -> str:
-        """Extract exploitation technique."""
-        content_lower = content.lower()
-        
-        techniques = {
-            "rop": "Return-Oriented Programming",
-            "buffer overflow": "Buffer Overflow",
-            "heap": "Heap Exploitation",
-            "stack": "Stack Overflow",
-            "format string": "Format String",
-            "use after free": "Use-After-Free",
-        }
-        
-        for key, value in techniques.items():
-            if key in content_lower:
-                return value
-        
-        return "General Binary Exploitation"
-    
-    def process_all(self) -> List[Dict]:
+        count = 0
+        for sample in self._map_files(
+            _process_binary_md, _iter_files(binary_dir, ".md")
+        ):
+            count += 1
+            yield sample
+
+        print(f"  ✅ Processed {count} binary exploitation samples")
+
+    def process_all(self) -> Iterator[Dict]:
         """Process all Phase 5 datasets.
-        
-        Returns:
-            List of all processed samples
+
+        Yields:
+            Dict: Samples from every category, streamed as produced
         """
         print("\n" + "=" * 80)
         print("🚀 Processing Phase 5 Datasets for Llama 3 Training")
         print("=" * 80)
-        
-        # Process all categories
-        all_samples = []
-        
-        all_samples.extend(self.process_malware_analysis())
-        all_samples.extend(self.process_phishing_data())
-        all_samples.extend(self.process_mobile_security())
-        all_samples.extend(self.process_cloud_security())
-        all_samples.extend(self.process_apt_intelligence())
-        all_samples.extend(self.process_binary_exploitation())
-        
+
+        # Chain all categories into one lazy stream - samples flow
+        # straight through to the consumer, never pooling in a list
+        total = 0
+        for sample in chain(
+            self.process_malware_analysis(),
+            self.process_phishing_data(),
+            self.process_mobile_security(),
+            self.process_cloud_security(),
+            self.process_apt_intelligence(),
+            self.process_binary_exploitation()
+        ):
+            total += 1
+            yield sample
+
         print("\n" + "=" * 80)
-        print(f"📊 Total Samples Processed: {len(all_samples)}")
+        print(f"📊 Total Samples Processed: {total}")
         print("=" * 80)
-        
-        return all_samples
-    
-    def save_samples(self, samples: List[Dict], output_file: str = "phase5_processed.jsonl"):
-        """Save processed samples to JSONL file.
-        
+
+    def save_samples(self, samples, output_file: str = "phase5_processed.jsonl",
+                     pretty: bool = False) -> Dict:
+        """Stream processed samples to per-category JSONL shards.
+
+        Each sample is written as it arrives from the producers, and
+        the statistics tallies are kept in the same pass - no full
+        sample list and no second serialization unless requested.
+
+        Output is sharded by sample category - one
+        ``phase5_<category>.jsonl`` per category - plus a
+        ``manifest.json`` listing the shards and their sample counts,
+        so downstream loaders can pick categories without re-reading
+        the data.
+
         Args:
-            samples: List of processed samples
-            output_file: Output filename
+            samples: Iterable of processed samples
+            output_file: Base name for the optional pretty .json copy
+            pretty: Also write an indented .json copy (buffers all
+                samples in memory; off by default)
+
+        Returns:
+            Dict: Tallies for generate_statistics
         """
-        output_path = self.output_dir / output_file
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
+        total = 0
+        duplicates = 0
+        # Raw 16-byte digests, not 32-char hex - half the set memory.
+        # Dedup lives here because this is the one point every sample
+        # passes through after the worker processes fan back in.
+        seen_ids = set()
+        category_counts = Counter()
+        instruction_chars = input_chars = output_chars = 0
+        pretty_buf = [] if pretty else None
+
+        # orjson encodes straight to UTF-8 bytes; the stdlib fallback
+        # encodes each line once, so both paths write binary
+        if orjson is not None:
+            dumps = orjson.dumps
+        else:
+            def dumps(sample):
+                return json.dumps(sample, ensure_ascii=False).encode('utf-8')
+
+        # One shard file per category, opened lazily on first sample
+        shards = {}
+        try:
             for sample in samples:
-                f.write(json.dumps(sample, ensure_ascii=False) + '\n')
-        
-        print(f"\n✅ Saved {len(samples)} samples to {output_path}")
-        
-        # Also save as regular JSON for easy viewing
-        json_path = self.output_dir / output_file.replace('.jsonl', '.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(samples, f, indent=2, ensure_ascii=False)
-        
-        print(f"✅ Also saved as JSON to {json_path}")
-    
-    def generate_statistics(self, samples: List[Dict]):
-        """Generate and print statistics about processed samples.
-        
+                digest = bytes.fromhex(sample['id'])
+                if digest in seen_ids:
+                    duplicates += 1
+                    continue
+                seen_ids.add(digest)
+
+                category = sample['category']
+                f = shards.get(category)
+                if f is None:
+                    shard_path = self.output_dir / f"phase5_{category}.jsonl"
+                    # 1 MiB buffer - the default 8 KiB flushes every
+                    # few samples, so this cuts write syscalls ~128x
+                    f = shards[category] = open(shard_path, 'wb',
+                                                buffering=1 << 20)
+
+                f.write(dumps(sample) + b'\n')
+                total += 1
+                category_counts[category] += 1
+                instruction_chars += len(sample['instruction'])
+                input_chars += len(sample['input'])
+                output_chars += len(sample['output'])
+                if pretty_buf is not None:
+                    pretty_buf.append(sample)
+        finally:
+            for f in shards.values():
+                f.close()
+
+        # Manifest for downstream loaders (WebDataset/Energon style):
+        # which shard holds which category, and how many samples
+        manifest = {
+            "total_samples": total,
+            "shards": [
+                {
+                    "file": f"phase5_{category}.jsonl",
+                    "category": category,
+                    "samples": count,
+                }
+                for category, count in sorted(category_counts.items())
+            ],
+        }
+        manifest_path = self.output_dir / "manifest.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        print(f"\n✅ Saved {total} samples across {len(shards)} shards in {self.output_dir}")
+        print(f"  📋 Shard manifest: {manifest_path}")
+        if duplicates:
+            print(f"  ♻️  Skipped {duplicates} duplicate samples")
+
+        if pretty_buf is not None:
+            # Also save as regular JSON for easy viewing
+            json_path = self.output_dir / output_file.replace('.jsonl', '.json')
+            if orjson is not None:
+                json_path.write_bytes(orjson.dumps(pretty_buf, option=orjson.OPT_INDENT_2))
+            else:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(pretty_buf, f, indent=2, ensure_ascii=False)
+
+            print(f"✅ Also saved as JSON to {json_path}")
+
+        return {
+            "total": total,
+            "category_counts": category_counts,
+            "instruction_chars": instruction_chars,
+            "input_chars": input_chars,
+            "output_chars": output_chars,
+        }
+
+    def generate_statistics(self, stats: Dict):
+        """Print statistics tallied during the save pass.
+
         Args:
-            samples: List of processed samples
+            stats: Tallies returned by save_samples
         """
-        from collections import Counter
-        
+        total = stats["total"]
+        if not total:
+            return
+
         print("\n" + "=" * 80)
         print("📊 Dataset Statistics")
         print("=" * 80)
-        
+
         # Category distribution
-        categories = [s['category'] for s in samples]
-        category_counts = Counter(categories)
-        
         print("\nCategory Distribution:")
-        for category, count in category_counts.most_common():
-            percentage = (count / len(samples)) * 100
+        for category, count in stats["category_counts"].most_common():
+            percentage = (count / total) * 100
             print(f"  {category:25s}: {count:6d} ({percentage:5.1f}%)")
-        
+
         # Average lengths
-        avg_instruction_len = sum(len(s['instruction']) for s in samples) / len(samples)
-        avg_input_len = sum(len(s['input']) for s in samples) / len(samples)
-        avg_output_len = sum(len(s['output']) for s in samples) / len(samples)
-        
         print("\nAverage Lengths:")
-        print(f"  Instruction: {avg_instruction_len:.0f} characters")
-        print(f"  Input:       {avg_input_len:.0f} characters")
-        print(f"  Output:      {avg_output_len:.0f} characters")
-        
+        print(f"  Instruction: {stats['instruction_chars'] / total:.0f} characters")
+        print(f"  Input:       {stats['input_chars'] / total:.0f} characters")
+        print(f"  Output:      {stats['output_chars'] / total:.0f} characters")
+
         print("=" * 80)
 
 
@@ -535,22 +857,32 @@ def main():
     parser.add_argument(
         "--output",
         default="phase5_processed.jsonl",
-        help="Output filename"
+        help="Base name for the optional pretty .json copy (JSONL output "
+             "is sharded per category as phase5_<category>.jsonl)"
     )
-    
+    parser.add_argument(
+        "--pretty-json",
+        action="store_true",
+        help="Also write an indented .json copy (buffers all samples in "
+             "memory; 'jq . file.jsonl' gives the same view for free)"
+    )
+
     args = parser.parse_args()
-    
-    # Process datasets
+
+    # INFO keeps per-file debug messages quiet by default; run with a
+    # DEBUG root logger to see which files were skipped and why
+    logging.basicConfig(level=logging.INFO)
+
+    # Process datasets - samples stream straight into the JSONL file
     preprocessor = Phase5Preprocessor(args.base_dir)
-    samples = preprocessor.process_all()
-    
-    if samples:
-        # Generate statistics
-        preprocessor.generate_statistics(samples)
-        
-        # Save results
-        preprocessor.save_samples(samples, args.output)
-        
+    stats = preprocessor.save_samples(
+        preprocessor.process_all(), args.output, pretty=args.pretty_json
+    )
+
+    if stats["total"]:
+        # Generate statistics from the tallies kept during the save
+        preprocessor.generate_statistics(stats)
+
         print("\n✅ Preprocessing complete!")
         print(f"📁 Output directory: {preprocessor.output_dir.absolute()}")
     else:
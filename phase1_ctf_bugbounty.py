@@ -4,127 +4,149 @@ Phase 1: CTF Writeups and Bug Bounty Reports Downloader
 Downloads CTF challenges writeups and bug bounty reports for cybersecurity training.
 """
 
-import os
+import asyncio
+import logging
 import subprocess
-import json
+import os
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Final, Tuple
+
+from _clone_worker import check_already_downloaded as _check_downloaded, clone_batch
+from _util import _dump_json, _repo_log, _to_aos
+
+# Optional async HTTP client - enables the direct hub-API fallback
+# when huggingface_hub is not installed
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Optional Rust download backend for Hugging Face - streams each file
+# over several parallel HTTP range requests. The flag is only set when
+# the package is importable, because huggingface_hub refuses to start
+# with it set and the backend missing.
+try:
+    import hf_transfer
+except ImportError:
+    hf_transfer = None
+else:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+# Module-level tuples: built once at import, and the summary
+# denominators below derive from them instead of hardcoded counts
+_CTF_REPOS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("https://github.com/ShundaZhang/htb", "htb_shundazhang"),
+    ("https://github.com/hackplayers/hackthebox-writeups", "htb_hackplayers"),
+    ("https://github.com/sohailburki1/HackTheBox-Writeups", "htb_sohailburki1"),
+    ("https://github.com/jon-brandy/hackthebox", "htb_jonbrandy"),
+    ("https://github.com/uppusaikiran/awesome-ctf-cheatsheet", "awesome_ctf_cheatsheet")
+)
+
+_BUGBOUNTY_REPOS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("https://github.com/reddelexc/hackerone-reports", "hackerone_reddelexc"),
+    ("https://github.com/buildergk/hackerone-bug-bounty-reports", "hackerone_buildergk"),
+    ("https://github.com/phlmox/public-reports", "public_reports_phlmox")
+)
 
 
 class Phase1Downloader:
     """Downloads CTF writeups and bug bounty reports."""
-    
-    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False):
+
+    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False,
+                 max_concurrent: int = None):
         """Initialize the Phase 1 downloader.
-        
+
         Args:
             base_dir: Base directory for all datasets
             update: Whether to update existing repositories
+            max_concurrent: Maximum git processes to run at once
+                (default: min(32, 2x CPU count))
         """
         self.base_dir = Path(base_dir)
         self.update = update
+        self.max_concurrent = max_concurrent or min(32, (os.cpu_count() or 4) * 2)
         self.phase_dir = self.base_dir / "phase1_ctf_bugbounty"
         self.ctf_dir = self.phase_dir / "ctf_writeups"
         self.bugbounty_dir = self.phase_dir / "bugbounty_repos"
         self.hackerone_dir = self.phase_dir / "hackerone_reports"
+        # Object store shared by every phase - repos referencing it
+        # skip fetching any objects it already holds
+        self.shared_objects = self.base_dir / ".shared_git_objects"
         
         # Create directories
         self.ctf_dir.mkdir(parents=True, exist_ok=True)
         self.bugbounty_dir.mkdir(parents=True, exist_ok=True)
         self.hackerone_dir.mkdir(parents=True, exist_ok=True)
         
+        if not (self.shared_objects / "objects").exists():
+            subprocess.run(
+                ["git", "init", "--bare", "--quiet", str(self.shared_objects)],
+                capture_output=True
+            )
+
+        # Repo outcomes accumulate as parallel lists (SoA) and are
+        # converted to the documented list-of-dicts once at save time
         self.results = {
-            "ctf_repos": [],
-            "bugbounty_repos": [],
+            "ctf_repos": _repo_log(),
+            "bugbounty_repos": _repo_log(),
             "hackerone_dataset": None,
             "errors": []
         }
     
-    def check_already_downloaded(self, target_dir: Path) -> bool:
+    def check_already_downloaded(self, target_dir) -> bool:
         """Check if repository already exists and is valid.
-        
+
+        Delegates to the shared clone worker's cached probe.
+
         Args:
             target_dir: Directory to check
-            
+
         Returns:
             bool: True if already exists and valid
         """
-        if not target_dir.exists():
-            return False
-        
-        # Check if it's a valid git repo or has content
-        if (target_dir / ".git").exists():
-            return True
-        
-        # Check if directory has any content
-        try:
-            if len(list(target_dir.iterdir())) > 0:
-                return True
-        except Exception:
-            pass
-        
-        return False
-    
-    def clone_repo(self, url: str, target_dir: Path) -> Tuple[bool, str]:
-        """Clone a git repository with error handling.
-        
-        Args:
-            url: Git repository URL
-            target_dir: Target directory for cloning
-            
+        return _check_downloaded(target_dir)
+
+    async def _hackerone_manifest_fallback(self) -> int:
+        """Download the HackerOne dataset directly from the hub API.
+
+        Fallback for when huggingface_hub is not installed: one
+        aiohttp session fetches the dataset's file manifest, then the
+        files download concurrently over a shared connection pool,
+        bounded by a semaphore.
+
         Returns:
-            Tuple of (success: bool, message: str)
+            int: Number of files downloaded
         """
-        try:
-            # Check if already downloaded
-            if self.check_already_downloaded(target_dir):
-                if self.update and (target_dir / ".git").exists():
-                    print(f"  🔄 Updating {target_dir.name}...")
-                    try:
-                        result = subprocess.run(
-                            ["git", "-C", str(target_dir), "pull"],
-                            capture_output=True,
-                            text=True,
-                            timeout=300
-                        )
-                        if result.returncode == 0:
-                            print(f"  ✅ Updated {target_dir.name}")
-                            return True, f"Updated: {target_dir.name}"
-                        else:
-                            print(f"  ⚠️  Update failed, keeping existing: {target_dir.name}")
-                            return True, f"Already exists: {target_dir.name}"
-                    except Exception as e:
-                        print(f"  ⚠️  Update failed: {e}, keeping existing")
-                        return True, f"Already exists: {target_dir.name}"
-                else:
-                    print(f"  ⏭️  Already exists: {target_dir.name}")
-                    return True, f"Already exists: {target_dir.name}"
-            
-            print(f"  📦 Cloning {url}...")
-            result = subprocess.run(
-                ["git", "clone", "--depth", "1", url, str(target_dir)],
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ Successfully cloned to {target_dir.name}")
-                return True, f"Successfully cloned: {target_dir.name}"
-            else:
-                error_msg = result.stderr.strip() or result.stdout.strip()
-                print(f"  ❌ Failed to clone: {error_msg}")
-                return False, f"Failed: {error_msg}"
-                
-        except subprocess.TimeoutExpired:
-            error_msg = "Clone operation timed out after 5 minutes"
-            print(f"  ❌ {error_msg}")
-            return False, error_msg
-        except Exception as e:
-            error_msg = f"Error cloning repository: {str(e)}"
-            print(f"  ❌ {error_msg}")
-            return False, error_msg
-    
+        repo_id = "Hacker0x01/hackerone_disclosed_reports"
+        api_url = f"https://huggingface.co/api/datasets/{repo_id}"
+        base_url = f"https://huggingface.co/datasets/{repo_id}/resolve/main/"
+        semaphore = asyncio.Semaphore(16)
+
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=16),
+            timeout=aiohttp.ClientTimeout(total=600)
+        ) as session:
+            async with session.get(api_url) as resp:
+                resp.raise_for_status()
+                manifest = await resp.json()
+
+            async def _fetch(filename: str) -> bool:
+                target = self.hackerone_dir / filename
+                target.parent.mkdir(parents=True, exist_ok=True)
+                async with semaphore:
+                    async with session.get(base_url + filename) as file_resp:
+                        if file_resp.status != 200:
+                            return False
+                        with open(target, "wb") as f:
+                            async for chunk in file_resp.content.iter_chunked(1 << 16):
+                                f.write(chunk)
+                return True
+
+            files = [s["rfilename"] for s in manifest.get("siblings", [])]
+            outcomes = await asyncio.gather(*[_fetch(name) for name in files])
+
+        return sum(outcomes)
+
     def download_hackerone_dataset(self) -> bool:
         """Download HackerOne dataset from Hugging Face or provide instructions.
         
@@ -132,26 +154,42 @@ class Phase1Downloader:
             bool: Success status
         """
         print("\n🎯 Downloading HackerOne Dataset...")
-        
+
         try:
             # Try to download from Hugging Face
             try:
                 from huggingface_hub import snapshot_download
-                
+
                 print("  📦 Downloading from Hugging Face...")
+                # Parallel file transfers - the dataset is many small
+                # files, so the workers overlap request latency.
+                # local_dir_use_symlinks is gone: it is deprecated and
+                # forced a full copy out of the hub cache.
                 snapshot_download(
                     repo_id="Hacker0x01/hackerone_disclosed_reports",
                     repo_type="dataset",
                     local_dir=str(self.hackerone_dir),
-                    local_dir_use_symlinks=False
+                    max_workers=min(16, (os.cpu_count() or 4) * 2),
+                    etag_timeout=30
                 )
                 print("  ✅ HackerOne dataset downloaded")
                 self.results["hackerone_dataset"] = "Downloaded from Hugging Face"
                 return True
-                
+
             except ImportError:
                 print("  ⚠️  huggingface_hub not installed")
+                if aiohttp is not None:
+                    print("  📦 Falling back to direct hub API download...")
+                    try:
+                        count = asyncio.run(self._hackerone_manifest_fallback())
+                        if count:
+                            print(f"  ✅ Downloaded {count} files via hub API")
+                            self.results["hackerone_dataset"] = "Downloaded via hub API"
+                            return True
+                    except Exception as e:
+                        print(f"  ⚠️  Fallback download failed: {str(e)}")
                 print("  💡 To download HackerOne dataset, install: pip install huggingface-hub")
+                print("  💡 For faster transfers, also install: pip install hf_transfer")
                 print("  💡 Then run: huggingface-cli download Hacker0x01/hackerone_disclosed_reports")
                 self.results["hackerone_dataset"] = "Manual download required"
                 return False
@@ -175,33 +213,24 @@ class Phase1Downloader:
         """
         print("\n🚩 Downloading CTF Writeup Repositories...")
         
-        ctf_repos = [
-            ("https://github.com/ShundaZhang/htb", "htb_shundazhang"),
-            ("https://github.com/hackplayers/hackthebox-writeups", "htb_hackplayers"),
-            ("https://github.com/sohailburki1/HackTheBox-Writeups", "htb_sohailburki1"),
-            ("https://github.com/jon-brandy/hackthebox", "htb_jonbrandy"),
-            ("https://github.com/uppusaikiran/awesome-ctf-cheatsheet", "awesome_ctf_cheatsheet")
-        ]
-        
+        outcomes = clone_batch(_CTF_REPOS, self.ctf_dir, self.max_concurrent,
+                               update=self.update,
+                               reference=self.shared_objects,
+                               allow_pygit2=True)
+
+        # Column appends only - no per-repo dict is built here
+        log = self.results["ctf_repos"]
         success_count = 0
-        for url, dir_name in ctf_repos:
-            target_dir = self.ctf_dir / dir_name
-            success, message = self.clone_repo(url, target_dir)
-            
+        for (url, dir_name), (success, message) in zip(_CTF_REPOS, outcomes):
+            log["url"].append(url)
+            log["directory"].append(dir_name)
             if success:
                 success_count += 1
-                self.results["ctf_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "success"
-                })
+                log["status"].append("success")
+                log["error"].append(None)
             else:
-                self.results["ctf_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "failed",
-                    "error": message
-                })
+                log["status"].append("failed")
+                log["error"].append(message)
                 self.results["errors"].append(f"CTF repo {url}: {message}")
         
         return success_count
@@ -214,31 +243,25 @@ class Phase1Downloader:
         """
         print("\n🐛 Downloading Bug Bounty Repositories...")
         
-        bugbounty_repos = [
-            ("https://github.com/reddelexc/hackerone-reports", "hackerone_reddelexc"),
-            ("https://github.com/buildergk/hackerone-bug-bounty-reports", "hackerone_buildergk"),
-            ("https://github.com/phlmox/public-reports", "public_reports_phlmox")
-        ]
-        
+        outcomes = clone_batch(_BUGBOUNTY_REPOS, self.bugbounty_dir,
+                               self.max_concurrent,
+                               update=self.update,
+                               reference=self.shared_objects,
+                               allow_pygit2=True)
+
+        # Column appends only - no per-repo dict is built here
+        log = self.results["bugbounty_repos"]
         success_count = 0
-        for url, dir_name in bugbounty_repos:
-            target_dir = self.bugbounty_dir / dir_name
-            success, message = self.clone_repo(url, target_dir)
-            
+        for (url, dir_name), (success, message) in zip(_BUGBOUNTY_REPOS, outcomes):
+            log["url"].append(url)
+            log["directory"].append(dir_name)
             if success:
                 success_count += 1
-                self.results["bugbounty_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "success"
-                })
+                log["status"].append("success")
+                log["error"].append(None)
             else:
-                self.results["bugbounty_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "failed",
-                    "error": message
-                })
+                log["status"].append("failed")
+                log["error"].append(message)
                 self.results["errors"].append(f"Bug bounty repo {url}: {message}")
         
         return success_count
@@ -266,8 +289,8 @@ class Phase1Downloader:
         print("\n" + "=" * 80)
         print("📊 PHASE 1 SUMMARY")
         print("=" * 80)
-        print(f"  CTF Repositories: {ctf_success}/5 successful")
-        print(f"  Bug Bounty Repositories: {bugbounty_success}/3 successful")
+        print(f"  CTF Repositories: {ctf_success}/{len(_CTF_REPOS)} successful")
+        print(f"  Bug Bounty Repositories: {bugbounty_success}/{len(_BUGBOUNTY_REPOS)} successful")
         print(f"  HackerOne Dataset: {'✅' if hackerone_success else '⚠️'}")
         
         if self.results["errors"]:
@@ -277,10 +300,14 @@ class Phase1Downloader:
         
         # Save results
         results_file = self.phase_dir / "phase1_results.json"
-        with open(results_file, "w") as f:
-            json.dump(self.results, f, indent=2)
-        
-        return self.results
+        results = {
+            **self.results,
+            "ctf_repos": _to_aos(self.results["ctf_repos"]),
+            "bugbounty_repos": _to_aos(self.results["bugbounty_repos"])
+        }
+        _dump_json(results_file, results)
+
+        return results
 
 
 def main():
@@ -295,10 +322,20 @@ def main():
         default="./cybersecurity_datasets",
         help="Base directory for datasets (default: ./cybersecurity_datasets)"
     )
-    
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=None,
+        help="Maximum concurrent git clones (default: min(32, 2x CPU count))"
+    )
+
     args = parser.parse_args()
-    
-    downloader = Phase1Downloader(args.dir)
+
+    # Plain message format keeps the CLI output identical; INFO level
+    # shows per-repo status, -W style filtering stays available
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    downloader = Phase1Downloader(args.dir, max_concurrent=args.max_concurrent)
     downloader.run()
 
 
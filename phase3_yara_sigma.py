@@ -4,125 +4,92 @@ Phase 3: YARA and Sigma Rules Downloader
 Downloads YARA and Sigma detection rules for threat detection.
 """
 
-import os
+import logging
 import subprocess
+import os
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Final, Tuple
+
+from _clone_worker import check_already_downloaded as _check_downloaded, clone_batch
+from _scan import _submit_tree, _tree_signature
+from _util import _dump_json, _repo_log, _to_aos
+
+
+# Module-level tuples: built once at import, and the summary
+# denominators below derive from them instead of hardcoded counts
+_YARA_REPOS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("https://github.com/Yara-Rules/rules", "yara_rules_official"),
+    ("https://github.com/Neo23x0/signature-base", "neo23x0_signature_base")
+)
+
+_SIGMA_REPOS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("https://github.com/SigmaHQ/sigma", "sigmahq_sigma"),
+    ("https://github.com/SigmaHQ/pySigma", "pysigma")  # Modern replacement for deprecated sigmac
+)
+
+
+# Only rule files are ever checked out - passed to the shared clone
+# worker's sparse-checkout path
+_SPARSE_PATTERNS = ("*.yar", "*.yara", "*.yml", "*.yaml")
 
 
 class Phase3Downloader:
     """Downloads YARA and Sigma rules."""
-    
-    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False):
+
+    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False,
+                 max_concurrent: int = None):
         """Initialize the Phase 3 downloader.
-        
+
         Args:
             base_dir: Base directory for all datasets
             update: Whether to update existing repositories
+            max_concurrent: Maximum git processes to run at once
+                (default: min(32, 2x CPU count))
         """
         self.base_dir = Path(base_dir)
         self.update = update
+        self.max_concurrent = max_concurrent or min(32, (os.cpu_count() or 4) * 2)
         self.phase_dir = self.base_dir / "phase3_yara_sigma"
         self.yara_dir = self.phase_dir / "yara_rules"
         self.sigma_dir = self.phase_dir / "sigma_rules"
+        # Object store shared by every phase - repos referencing it
+        # skip fetching any objects it already holds
+        self.shared_objects = self.base_dir / ".shared_git_objects"
         
         # Create directories
         self.yara_dir.mkdir(parents=True, exist_ok=True)
         self.sigma_dir.mkdir(parents=True, exist_ok=True)
         
+        if not (self.shared_objects / "objects").exists():
+            subprocess.run(
+                ["git", "init", "--bare", "--quiet", str(self.shared_objects)],
+                capture_output=True
+            )
+
+        # Repo outcomes accumulate as parallel lists (SoA) and are
+        # converted to the documented list-of-dicts once at save time
         self.results = {
-            "yara_repos": [],
-            "sigma_repos": [],
+            "yara_repos": _repo_log(),
+            "sigma_repos": _repo_log(),
             "statistics": {},
             "errors": []
         }
     
-    def check_already_downloaded(self, target_dir: Path) -> bool:
+    def check_already_downloaded(self, target_dir) -> bool:
         """Check if repository already exists and is valid.
-        
+
+        Delegates to the shared clone worker's cached probe.
+
         Args:
             target_dir: Directory to check
-            
+
         Returns:
             bool: True if already exists and valid
         """
-        if not target_dir.exists():
-            return False
-        
-        # Check if it's a valid git repo or has content
-        if (target_dir / ".git").exists():
-            return True
-        
-        # Check if directory has any content
-        try:
-            if len(list(target_dir.iterdir())) > 0:
-                return True
-        except Exception:
-            pass
-        
-        return False
-    
-    def clone_repo(self, url: str, target_dir: Path) -> Tuple[bool, str]:
-        """Clone a git repository with error handling.
-        
-        Args:
-            url: Git repository URL
-            target_dir: Target directory for cloning
-            
-        Returns:
-            Tuple of (success: bool, message: str)
-        """
-        try:
-            # Check if already downloaded
-            if self.check_already_downloaded(target_dir):
-                if self.update and (target_dir / ".git").exists():
-                    print(f"  🔄 Updating {target_dir.name}...")
-                    try:
-                        result = subprocess.run(
-                            ["git", "-C", str(target_dir), "pull"],
-                            capture_output=True,
-                            text=True,
-                            timeout=300
-                        )
-                        if result.returncode == 0:
-                            print(f"  ✅ Updated {target_dir.name}")
-                            return True, f"Updated: {target_dir.name}"
-                        else:
-                            print(f"  ⚠️  Update failed, keeping existing: {target_dir.name}")
-                            return True, f"Already exists: {target_dir.name}"
-                    except Exception as e:
-                        print(f"  ⚠️  Update failed: {e}, keeping existing")
-                        return True, f"Already exists: {target_dir.name}"
-                else:
-                    print(f"  ⏭️  Already exists: {target_dir.name}")
-                    return True, f"Already exists: {target_dir.name}"
-            
-            print(f"  📦 Cloning {url}...")
-            result = subprocess.run(
-                ["git", "clone", "--depth", "1", url, str(target_dir)],
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ Successfully cloned to {target_dir.name}")
-                return True, f"Successfully cloned: {target_dir.name}"
-            else:
-                error_msg = result.stderr.strip() or result.stdout.strip()
-                print(f"  ❌ Failed to clone: {error_msg}")
-                return False, f"Failed: {error_msg}"
-                
-        except subprocess.TimeoutExpired:
-            error_msg = "Clone operation timed out after 5 minutes"
-            print(f"  ❌ {error_msg}")
-            return False, error_msg
-        except Exception as e:
-            error_msg = f"Error cloning repository: {str(e)}"
-            print(f"  ❌ {error_msg}")
-            return False, error_msg
-    
+        return _check_downloaded(target_dir)
+
     def download_yara_rules(self) -> int:
         """Download YARA rules repositories.
         
@@ -131,30 +98,25 @@ class Phase3Downloader:
         """
         print("\n🛡️  Downloading YARA Rules...")
         
-        yara_repos = [
-            ("https://github.com/Yara-Rules/rules", "yara_rules_official"),
-            ("https://github.com/Neo23x0/signature-base", "neo23x0_signature_base")
-        ]
-        
+        outcomes = clone_batch(_YARA_REPOS, self.yara_dir, self.max_concurrent,
+                               update=self.update,
+                               reference=self.shared_objects,
+                               sparse_patterns=_SPARSE_PATTERNS,
+                               bare_worktree=True)
+
+        # Column appends only - no per-repo dict is built here
+        log = self.results["yara_repos"]
         success_count = 0
-        for url, dir_name in yara_repos:
-            target_dir = self.yara_dir / dir_name
-            success, message = self.clone_repo(url, target_dir)
-            
+        for (url, dir_name), (success, message) in zip(_YARA_REPOS, outcomes):
+            log["url"].append(url)
+            log["directory"].append(dir_name)
             if success:
                 success_count += 1
-                self.results["yara_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "success"
-                })
+                log["status"].append("success")
+                log["error"].append(None)
             else:
-                self.results["yara_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "failed",
-                    "error": message
-                })
+                log["status"].append("failed")
+                log["error"].append(message)
                 self.results["errors"].append(f"YARA repo {url}: {message}")
         
         return success_count
@@ -167,71 +129,100 @@ class Phase3Downloader:
         """
         print("\n🚨 Downloading Sigma Rules...")
         
-        sigma_repos = [
-            ("https://github.com/SigmaHQ/sigma", "sigmahq_sigma"),
-            ("https://github.com/SigmaHQ/pySigma", "pysigma")  # Modern replacement for deprecated sigmac
-        ]
-        
+        outcomes = clone_batch(_SIGMA_REPOS, self.sigma_dir, self.max_concurrent,
+                               update=self.update,
+                               reference=self.shared_objects,
+                               sparse_patterns=_SPARSE_PATTERNS,
+                               bare_worktree=True)
+
+        # Column appends only - no per-repo dict is built here
+        log = self.results["sigma_repos"]
         success_count = 0
-        for url, dir_name in sigma_repos:
-            target_dir = self.sigma_dir / dir_name
-            success, message = self.clone_repo(url, target_dir)
-            
+        for (url, dir_name), (success, message) in zip(_SIGMA_REPOS, outcomes):
+            log["url"].append(url)
+            log["directory"].append(dir_name)
             if success:
                 success_count += 1
-                self.results["sigma_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "success"
-                })
+                log["status"].append("success")
+                log["error"].append(None)
             else:
-                self.results["sigma_repos"].append({
-                    "url": url,
-                    "directory": dir_name,
-                    "status": "failed",
-                    "error": message
-                })
+                log["status"].append("failed")
+                log["error"].append(message)
                 self.results["errors"].append(f"Sigma repo {url}: {message}")
         
         return success_count
     
     def count_rules(self) -> Dict[str, int]:
         """Count YARA and Sigma rule files.
-        
+
+        The counts from the previous run are reused when the rule
+        trees' mtime signatures are unchanged, so a re-run with no new
+        clones skips the full walks entirely.
+
         Returns:
             Dict: Statistics about rule files
         """
         print("\n📊 Counting Rules...")
-        
+
+        stats_file = self.phase_dir / "rules_statistics.json"
+        yara_sig = _tree_signature(self.yara_dir)
+        sigma_sig = _tree_signature(self.sigma_dir)
+
+        # Reuse the persisted counts when nothing changed
+        try:
+            with open(stats_file, "rb") as f:
+                cached = json.loads(f.read())
+            if (cached["yara_mtime_ns"] == yara_sig
+                    and cached["sigma_mtime_ns"] == sigma_sig):
+                stats = {
+                    "yara_files": cached["yara_files"],
+                    "sigma_files": cached["sigma_files"],
+                    "total_files": cached["total_files"]
+                }
+                print(f"  🛡️  YARA rules: {stats['yara_files']} (cached)")
+                print(f"  🚨 Sigma rules: {stats['sigma_files']} (cached)")
+                print(f"  📈 Total rules: {stats['total_files']}")
+                self.results["statistics"] = stats
+                return stats
+        except (OSError, ValueError, KeyError):
+            pass
+
         stats = {
             "yara_files": 0,
             "sigma_files": 0,
             "total_files": 0
         }
-        
-        # Count YARA rules (.yar, .yara)
-        if self.yara_dir.exists():
-            yara_files = list(self.yara_dir.rglob("*.yar")) + list(self.yara_dir.rglob("*.yara"))
-            stats["yara_files"] = len(yara_files)
-            print(f"  🛡️  YARA rules: {stats['yara_files']}")
-        
-        # Count Sigma rules (.yml, .yaml)
-        if self.sigma_dir.exists():
-            sigma_files = list(self.sigma_dir.rglob("*.yml")) + list(self.sigma_dir.rglob("*.yaml"))
-            stats["sigma_files"] = len(sigma_files)
-            print(f"  🚨 Sigma rules: {stats['sigma_files']}")
-        
+
+        # The walks are partitioned per cloned repo and spread over a
+        # process pool, so large trees like signature-base are scanned
+        # by several workers at once
+        with ProcessPoolExecutor(
+                max_workers=min(os.cpu_count() or 1, 8)) as executor:
+            yara_direct, yara_futs = _submit_tree(
+                executor, self.yara_dir, (".yar", ".yara"))
+            sigma_direct, sigma_futs = _submit_tree(
+                executor, self.sigma_dir, (".yml", ".yaml"))
+            stats["yara_files"] = yara_direct + sum(
+                f.result() for f in yara_futs)
+            stats["sigma_files"] = sigma_direct + sum(
+                f.result() for f in sigma_futs)
+
+        print(f"  🛡️  YARA rules: {stats['yara_files']}")
+        print(f"  🚨 Sigma rules: {stats['sigma_files']}")
+
         stats["total_files"] = stats["yara_files"] + stats["sigma_files"]
         print(f"  📈 Total rules: {stats['total_files']}")
-        
+
         self.results["statistics"] = stats
-        
-        # Save statistics
-        stats_file = self.phase_dir / "rules_statistics.json"
-        with open(stats_file, "w") as f:
-            json.dump(stats, f, indent=2)
+
+        # Save statistics, with the signatures that validate them
+        _dump_json(stats_file, {
+            **stats,
+            "yara_mtime_ns": yara_sig,
+            "sigma_mtime_ns": sigma_sig
+        })
         print(f"  ✅ Statistics saved to {stats_file.name}")
-        
+
         return stats
     
     def run(self) -> Dict:
@@ -257,8 +248,8 @@ class Phase3Downloader:
         print("\n" + "=" * 80)
         print("📊 PHASE 3 SUMMARY")
         print("=" * 80)
-        print(f"  YARA Repositories: {yara_success}/2 successful")
-        print(f"  Sigma Repositories: {sigma_success}/2 successful")
+        print(f"  YARA Repositories: {yara_success}/{len(_YARA_REPOS)} successful")
+        print(f"  Sigma Repositories: {sigma_success}/{len(_SIGMA_REPOS)} successful")
         print(f"  Total YARA Rules: {stats['yara_files']}")
         print(f"  Total Sigma Rules: {stats['sigma_files']}")
         print(f"  Total Rules: {stats['total_files']}")
@@ -270,10 +261,14 @@ class Phase3Downloader:
         
         # Save results
         results_file = self.phase_dir / "phase3_results.json"
-        with open(results_file, "w") as f:
-            json.dump(self.results, f, indent=2)
-        
-        return self.results
+        results = {
+            **self.results,
+            "yara_repos": _to_aos(self.results["yara_repos"]),
+            "sigma_repos": _to_aos(self.results["sigma_repos"])
+        }
+        _dump_json(results_file, results)
+
+        return results
 
 
 def main():
@@ -288,10 +283,20 @@ def main():
         default="./cybersecurity_datasets",
         help="Base directory for datasets (default: ./cybersecurity_datasets)"
     )
-    
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=None,
+        help="Maximum concurrent git clones (default: min(32, 2x CPU count))"
+    )
+
     args = parser.parse_args()
-    
-    downloader = Phase3Downloader(args.dir)
+
+    # Plain message format keeps the CLI output identical; INFO level
+    # shows per-repo status, -W style filtering stays available
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    downloader = Phase3Downloader(args.dir, max_concurrent=args.max_concurrent)
     downloader.run()
 
 
@@ -4,36 +4,264 @@ Phase 4: CVE Database Downloader
 Downloads CVE data from the National Vulnerability Database (NVD) API.
 """
 
+import asyncio
+import io
+import logging
+import mmap
 import os
+import threading
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+
+# Optional fast JSON codec - a year of CVEs is 100+ MB of JSON, and
+# orjson parses and serializes it several times faster than stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional async HTTP client - enables concurrent page fetches once
+# the first response reports how many results there are
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Optional streaming JSON parser - counts entries in an existing CVE
+# file without materializing it
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Optional Brotli bindings - NVD JSON is >90% compressible and br
+# beats gzip by another 3-4x on it, but advertising br without a
+# decoder would break response decoding, so it is gated on the import
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+_ACCEPT_ENCODING = "br, gzip" if brotli is not None else "gzip, deflate"
+
+# Per-page status goes through logging - the records format lazily
+# and are filterable, unlike eager f-string prints in the hot loop
+_log = logging.getLogger(__name__)
+
+# Optional zstd bindings - compresses the NDJSON output ~10x, cutting
+# the disk I/O both here and in every consumer
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+
+# Parsing goes through one name so the fast path needs no call-site
+# branching
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dump_json(path, data, indent: bool = True) -> None:
+    """Write JSON atomically, using orjson when available.
+
+    orjson serializes straight to bytes in C; the stdlib writer is
+    the fallback. Non-string keys (the by-year statistics use int
+    years) are coerced, as stdlib json does. The bytes land in a
+    sibling .tmp file that is moved into place with os.replace, so an
+    interrupted run never leaves a truncated file behind for the next
+    run's existence checks to trip over.
+
+    Args:
+        path: Destination file (str or Path)
+        data: JSON-serializable object
+        indent: Pretty-print the output; pass False for the large
+            machine-read payloads, where the per-level whitespace
+            roughly doubles the bytes written for no reader's benefit
+    """
+    tmp_path = os.fspath(path) + ".tmp"
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=option))
+    else:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2 if indent else None)
+    os.replace(tmp_path, path)
+
+
+# Fields kept by the default ingest projection - the rest of the NVD
+# payload (configurations, references, weaknesses, ...) is bulk that
+# the training pipelines never read
+_CVE_PROJECTION = ("id", "published", "lastModified", "metrics",
+                   "descriptions")
+
+
+def _project(vulnerability: Dict) -> Dict:
+    """Strip a vulnerability entry down to the projected fields.
+
+    The {"cve": {...}} wrapper is preserved so consumers (and the
+    lastModified cursor) keep the same shape as the full payload.
+
+    Args:
+        vulnerability: Full NVD vulnerability entry
+
+    Returns:
+        Dict: Entry with only the projected cve fields
+    """
+    cve = vulnerability.get("cve", {})
+    return {"cve": {key: cve.get(key) for key in _CVE_PROJECTION}}
+
+
+def _open_lines(path: Path):
+    """Open an NDJSON file for line iteration, decompressing if needed.
+
+    Args:
+        path: .ndjson or .ndjson.zst file
+
+    Returns:
+        Binary file-like object yielding raw lines
+    """
+    f = open(path, "rb")
+    if path.name.endswith(".zst"):
+        return io.BufferedReader(zstd.ZstdDecompressor().stream_reader(f))
+    return f
+
+
+def _severity(cve: Dict) -> Optional[str]:
+    """Best-available CVSS base severity for one CVE entry.
+
+    Prefers v3.1, then v3.0, then v2 metrics, matching how NVD's own
+    UI picks the displayed score.
+
+    Args:
+        cve: The inner cve object of a vulnerability entry
+
+    Returns:
+        Severity string (e.g. "HIGH"), or None if no metric carries one
+    """
+    metrics = cve.get("metrics") or {}
+    for key in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+        for metric in metrics.get(key) or []:
+            severity = (metric.get("cvssData", {}).get("baseSeverity")
+                        or metric.get("baseSeverity"))
+            if severity:
+                return severity
+    return None
+
+
+def _dumps_line(obj) -> bytes:
+    """Serialize one object as an NDJSON line.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        bytes: Encoded line including the trailing newline
+    """
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode()
+
+
+class _TokenBucket:
+    """Blocking token bucket matched to NVD's rolling request budget.
+
+    Credit accrues continuously and is consumed only when a request is
+    actually issued, so a burst up to the bucket capacity goes out
+    immediately and the loop only waits when it is genuinely ahead of
+    the budget - unlike a fixed post-request sleep, which charges the
+    worst-case delay even after a fast response.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the bucket.
+
+        Args:
+            rate: Tokens replenished per second
+            capacity: Maximum tokens the bucket can hold
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        # One bucket is shared by every concurrent download, so the
+        # combined request rate stays inside the budget
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping just long enough if none is left."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
 
 
 class Phase4Downloader:
     """Downloads CVE database from NVD API."""
     
-    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False):
+    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False,
+                 full: bool = False, session: Optional[requests.Session] = None,
+                 limiter: Optional[_TokenBucket] = None):
         """Initialize the Phase 4 downloader.
         
         Args:
             base_dir: Base directory for all datasets
             update: Whether to update existing data
+            full: Store complete NVD payloads instead of the id /
+                dates / metrics / descriptions projection
+            session: Shared requests.Session; an orchestrator running
+                several phases can pass one so connection pools and
+                TLS handshakes are shared (default: a private pool)
+            limiter: Shared rate limiter, likewise injectable so one
+                request budget covers every caller (default: a bucket
+                sized from the API key)
         """
         self.base_dir = Path(base_dir)
         self.update = update
+        self.full = full
         self.phase_dir = self.base_dir / "phase4_cve_database"
         self.phase_dir.mkdir(parents=True, exist_ok=True)
         
         self.api_base = "https://services.nvd.nist.gov/rest/json/cves/2.0"
         self.api_key = "fbc63a0b-ed3b-4881-89e4-9739ace7ffbb" # os.environ.get("NVD_API_KEY")
         
-        # Rate limiting based on API key presence
-        self.rate_limit_delay = 0.6 if self.api_key else 6.0
-        
+        self.limiter = limiter if limiter is not None else self._make_limiter()
+        # A session handed in by an orchestrator stays open after
+        # run() - only a privately built one is closed here
+        self._owns_session = session is None
+        self.session = session if session is not None else self._make_session()
+
+        # Guards results mutations when downloads run concurrently
+        self._results_lock = threading.Lock()
+
+        # Newest lastModified timestamp saved by the previous
+        # recent-modified run; lets the next run fetch only the delta
+        self.cursor_file = self.phase_dir / "cve_recent_modified.cursor"
+        try:
+            self.last_mod_cursor = self.cursor_file.read_text().strip() or None
+        except OSError:
+            self.last_mod_cursor = None
+
         self.results = {
             "cve_files": [],
             "total_cves": 0,
@@ -42,11 +270,328 @@ class Phase4Downloader:
         }
         
         if self.api_key:
-            print("  🔑 NVD API key detected - using faster rate limit (0.6s)")
+            print("  🔑 NVD API key detected - using faster rate limit (50 req/30s)")
         else:
-            print("  ⚠️  No NVD API key - using slower rate limit (6s)")
+            print("  ⚠️  No NVD API key - using slower rate limit (5 req/30s)")
             print("  💡 Set NVD_API_KEY environment variable for faster downloads")
     
+    def _make_limiter(self) -> _TokenBucket:
+        """Build a rate limiter sized to NVD's request budget.
+
+        NVD allows 50 requests per rolling 30s with an API key, 5
+        without.
+
+        Returns:
+            _TokenBucket: Limiter matched to the detected budget
+        """
+        if self.api_key:
+            return _TokenBucket(rate=50 / 30, capacity=50)
+        return _TokenBucket(rate=5 / 30, capacity=5)
+
+    def _make_session(self) -> requests.Session:
+        """Build the pooled NVD session.
+
+        Keep-alive reuses the TCP/TLS connection across paginated
+        batches instead of handshaking per page, and urllib3 retries
+        transient errors (honoring Retry-After on 429) before the
+        caller sees them.
+
+        Returns:
+            requests.Session: Configured session
+        """
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=1.0,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True
+            )
+        ))
+        session.headers["Accept-Encoding"] = _ACCEPT_ENCODING
+        if self.api_key:
+            session.headers.update({"apiKey": self.api_key})
+        return session
+
+    def _fetch_pages(self, base_params: Dict, batch_size: int = 2000,
+                     not_found_ok: bool = False, on_page=None):
+        """Fetch every page of an NVD query.
+
+        With aiohttp installed the pages download concurrently: the
+        first response reports totalResults, so the remaining offsets
+        are dispatched together instead of one round-trip at a time.
+        Falls back to the serial session loop otherwise.
+
+        Args:
+            base_params: Query parameters without pagination fields
+            batch_size: Number of CVEs per request
+            not_found_ok: Treat a 404 as "no data" and return None
+            on_page: Optional callable receiving each page's
+                vulnerability list as it arrives; when given, pages
+                are streamed out instead of accumulated
+
+        Returns:
+            List of vulnerability entries (or the entry count when
+            on_page is given); None on an accepted 404
+        """
+        if aiohttp is not None:
+            return asyncio.run(self._fetch_pages_async(
+                base_params, batch_size, not_found_ok, on_page))
+        return self._fetch_pages_serial(
+            base_params, batch_size, not_found_ok, on_page)
+
+    async def _fetch_pages_async(self, base_params: Dict, batch_size: int,
+                                 not_found_ok: bool, on_page=None):
+        """Concurrent variant of the pagination loop.
+
+        The semaphore keeps in-flight requests within NVD's budget (5
+        with an API key, 1 without) and the connector caps connections
+        below NVD's ~20-per-host limit; the shared token bucket
+        spreads requests over the 30-second budget window instead of
+        bursting, even when several downloads run at once.
+
+        Args:
+            base_params: Query parameters without pagination fields
+            batch_size: Number of CVEs per request
+            not_found_ok: Treat a 404 as "no data" and return None
+
+        Returns:
+            List of vulnerability entries, or None on an accepted 404
+        """
+        semaphore = asyncio.Semaphore(5 if self.api_key else 1)
+        headers = {"Accept-Encoding": _ACCEPT_ENCODING}
+        if self.api_key:
+            headers["apiKey"] = self.api_key
+
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=19),
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=300)
+        ) as session:
+
+            async def _fetch_page(start_index: int) -> Optional[Dict]:
+                params = {**base_params,
+                          "startIndex": start_index,
+                          "resultsPerPage": batch_size}
+                for attempt in range(6):
+                    async with semaphore:
+                        # Shared bucket - blocking, so it runs in a
+                        # worker thread to keep the loop free
+                        await asyncio.to_thread(self.limiter.acquire)
+                        _log.info("  📦 Fetching batch starting at index %d...", start_index)
+                        async with session.get(self.api_base, params=params) as resp:
+                            if resp.status == 404 and not_found_ok:
+                                return None
+                            if resp.status != 429:
+                                resp.raise_for_status()
+                                return _loads(await resp.read())
+                            # The server says exactly how long to back
+                            # off; capped exponential growth covers a
+                            # missing header
+                            delay = float(resp.headers.get(
+                                "Retry-After", min(300, 30 * 2 ** attempt)))
+                    _log.info("  ⏸️  Rate limited - waiting %.0f seconds...", delay)
+                    await asyncio.sleep(delay)
+                raise RuntimeError(
+                    f"Rate limited after repeated retries (index {start_index})")
+
+            first = await _fetch_page(0)
+            if first is None:
+                return None
+
+            total_results = first.get("totalResults", 0)
+            offsets = range(batch_size, total_results, batch_size)
+
+            if on_page is not None:
+                # Streamed out in completion order - only the pages
+                # currently in flight are ever held in memory
+                count = len(first.get("vulnerabilities", []))
+                on_page(first.get("vulnerabilities", []))
+                for task in asyncio.as_completed(
+                        [_fetch_page(offset) for offset in offsets]):
+                    page = await task
+                    if page:
+                        vulnerabilities = page.get("vulnerabilities", [])
+                        count += len(vulnerabilities)
+                        on_page(vulnerabilities)
+                _log.info("  📊 Retrieved %d/%d CVEs", count, total_results)
+                return count
+
+            # Pre-sized once from totalResults - pages land by slice
+            # assignment, so the list never reallocates as it grows
+            all_vulnerabilities: List = [None] * total_results
+            page_items = first.get("vulnerabilities", [])
+            all_vulnerabilities[:len(page_items)] = page_items
+            write_pos = len(page_items)
+            pages = await asyncio.gather(*[_fetch_page(offset)
+                                           for offset in offsets])
+            for page in pages:
+                if page:
+                    page_items = page.get("vulnerabilities", [])
+                    all_vulnerabilities[
+                        write_pos:write_pos + len(page_items)] = page_items
+                    write_pos += len(page_items)
+            # NVD's count can drift mid-download; drop any unfilled tail
+            del all_vulnerabilities[write_pos:]
+            _log.info("  📊 Retrieved %d/%d CVEs", len(all_vulnerabilities), total_results)
+            return all_vulnerabilities
+
+    def _fetch_pages_serial(self, base_params: Dict, batch_size: int,
+                            not_found_ok: bool, on_page=None):
+        """Serial fallback pagination loop over the pooled session.
+
+        Args:
+            base_params: Query parameters without pagination fields
+            batch_size: Number of CVEs per request
+            not_found_ok: Treat a 404 as "no data" and return None
+            on_page: Optional per-page callable; pages are streamed to
+                it instead of accumulated
+
+        Returns:
+            List of vulnerability entries (or the entry count when
+            on_page is given); None on an accepted 404
+        """
+        all_vulnerabilities: Optional[List] = None
+        count = 0
+        start_index = 0
+
+        while True:
+            params = {**base_params,
+                      "startIndex": start_index,
+                      "resultsPerPage": batch_size}
+
+            _log.info("  📦 Fetching batch starting at index %d...", start_index)
+
+            self.limiter.acquire()
+
+            # 429s are retried inside the session adapter, which
+            # honors Retry-After instead of a blind fixed sleep
+            response = self.session.get(self.api_base, params=params, timeout=30)
+
+            if response.status_code == 404 and not_found_ok:
+                return None
+
+            response.raise_for_status()
+            data = _loads(response.content)
+
+            vulnerabilities = data.get("vulnerabilities", [])
+            total_results = data.get("totalResults", 0)
+
+            if not vulnerabilities:
+                break
+
+            if on_page is not None:
+                on_page(vulnerabilities)
+                count += len(vulnerabilities)
+            else:
+                if all_vulnerabilities is None:
+                    # Pre-sized once from totalResults - later pages
+                    # land by slice assignment instead of growing the
+                    # list page by page
+                    all_vulnerabilities = [None] * total_results
+                all_vulnerabilities[
+                    count:count + len(vulnerabilities)] = vulnerabilities
+                count += len(vulnerabilities)
+            _log.info("  📊 Retrieved %d CVEs (%d/%d)", len(vulnerabilities), count, total_results)
+
+            if count >= total_results:
+                break
+
+            start_index += len(vulnerabilities)
+
+        if on_page is not None:
+            return count
+        if all_vulnerabilities is None:
+            return []
+        # NVD's count can drift mid-download; drop any unfilled tail
+        del all_vulnerabilities[count:]
+        return all_vulnerabilities
+
+    def _count_existing(self, output_file: Path) -> int:
+        """Count the CVEs in an existing download without reloading it.
+
+        The sidecar .meta.json written at save time answers in one
+        tiny read; without it, ijson streams the entries in constant
+        memory, and only when neither is available does the full
+        multi-hundred-MB parse happen.
+
+        Args:
+            output_file: Existing cve_<year> .ndjson or .json file
+
+        Returns:
+            int: Number of vulnerability entries in the file
+        """
+        meta_file = output_file.with_name(
+            output_file.name.split(".")[0] + ".meta.json")
+        try:
+            with open(meta_file, "rb") as f:
+                return _loads(f.read())["cve_count"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if ".ndjson" in output_file.suffixes:
+            # One entry per line - no parsing needed for a count
+            with _open_lines(output_file) as f:
+                return sum(1 for line in f if line.strip())
+
+        if ijson is not None:
+            with open(output_file, "rb") as f:
+                return sum(1 for _ in ijson.items(f, "vulnerabilities.item"))
+
+        # Last resort: parse the whole legacy file. Mapping it hands
+        # orjson the page-cache bytes directly instead of copying the
+        # entire file into a Python bytes object first, and the
+        # sequential advice lets the kernel read ahead
+        with open(output_file, "rb") as f:
+            if orjson is not None:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    return len(_loads(memoryview(mm))
+                               .get("vulnerabilities", []))
+            return len(_loads(f.read()).get("vulnerabilities", []))
+
+    def _load_year_index(self) -> Dict[str, str]:
+        """Map CVE id to lastModified across the downloaded year files.
+
+        Streams the NDJSON files line by line (legacy monolithic
+        files are parsed whole), so the index costs one pass over
+        data that is already on disk.
+
+        Returns:
+            Dict: CVE id -> lastModified timestamp
+        """
+        index: Dict[str, str] = {}
+        for path in sorted(self.phase_dir.glob("cve_*")):
+            base, _, rest = path.name.partition(".")
+            if ("meta" in rest or rest.endswith(".tmp")
+                    or not rest.startswith(("json", "ndjson"))):
+                continue
+            try:
+                int(base.rsplit("_", 1)[1])
+            except (IndexError, ValueError):
+                continue
+            try:
+                if "ndjson" in rest:
+                    with _open_lines(path) as f:
+                        entries = (_loads(line) for line in f if line.strip())
+                        for vulnerability in entries:
+                            cve = vulnerability.get("cve", {})
+                            if cve.get("id"):
+                                index[cve["id"]] = cve.get("lastModified", "")
+                else:
+                    with open(path, "rb") as f:
+                        for vulnerability in _loads(f.read()).get(
+                                "vulnerabilities", []):
+                            cve = vulnerability.get("cve", {})
+                            if cve.get("id"):
+                                index[cve["id"]] = cve.get("lastModified", "")
+            except Exception:
+                continue
+        return index
+
     def download_cve_by_year(self, year: int, batch_size: int = 2000) -> bool:
         """Download CVEs for a specific year with pagination.
         
@@ -59,124 +604,121 @@ class Phase4Downloader:
         """
         print(f"\n🔍 Downloading CVEs for {year}...")
         
-        output_file = self.phase_dir / f"cve_{year}.json"
+        suffix = ".ndjson.zst" if zstd is not None else ".ndjson"
+        output_file = self.phase_dir / f"cve_{year}{suffix}"
         
-        # Check if file already exists
-        if output_file.exists():
+        # Check if file already exists - earlier layouts (plain NDJSON
+        # and the monolithic JSON file) are still honored on resume
+        existing = output_file
+        for name in (f"cve_{year}.ndjson.zst", f"cve_{year}.ndjson",
+                     f"cve_{year}.json"):
+            candidate = self.phase_dir / name
+            if candidate.exists():
+                existing = candidate
+                break
+        if existing.exists():
             if not self.update:
-                print(f"  ⏭️  File already exists: {output_file.name}")
+                print(f"  ⏭️  File already exists: {existing.name}")
                 try:
-                    with open(output_file, "r") as f:
-                        data = json.load(f)
-                        cve_count = len(data.get("vulnerabilities", []))
-                        print(f"  📊 Contains {cve_count} CVEs")
+                    cve_count = self._count_existing(existing)
+                    print(f"  📊 Contains {cve_count} CVEs")
+                    with self._results_lock:
                         self.results["cve_files"].append({
                             "year": year,
-                            "file": output_file.name,
+                            "file": existing.name,
                             "cve_count": cve_count,
                             "status": "already_exists"
                         })
                         self.results["total_cves"] += cve_count
-                        return True
+                    return True
                 except Exception as e:
                     print(f"  ⚠️  Error reading existing file: {e}")
             else:
                 print(f"  🔄 Updating CVEs for {year}...")
         
-        all_vulnerabilities = []
-        start_index = 0
-        
         # Date range for the year - use correct NVD API v2.0 format
         pub_start_date = f"{year}-01-01T00:00:00.000 UTC-00:00"
         pub_end_date = f"{year}-12-31T23:59:59.999 UTC-00:00"
         
+        # The stream builds in a sibling temp file and only an
+        # os.replace of the finished download makes output_file exist,
+        # so the resume check above can never accept a partial file
+        tmp_file = output_file.with_name(output_file.name + ".tmp")
         try:
-            while True:
-                # Prepare request parameters
-                params = {
-                    "pubStartDate": pub_start_date,
-                    "pubEndDate": pub_end_date,
-                    "startIndex": start_index,
-                    "resultsPerPage": batch_size
-                }
-                
-                headers = {}
-                if self.api_key:
-                    headers["apiKey"] = self.api_key
-                
-                print(f"  📦 Fetching batch starting at index {start_index}...")
-                
-                # Make API request
-                try:
-                    response = requests.get(
-                        self.api_base,
-                        params=params,
-                        headers=headers,
-                        timeout=30
-                    )
-                    
-                    # Handle rate limiting
-                    if response.status_code == 429:
-                        print("  ⏸️  Rate limited - waiting 60 seconds...")
-                        time.sleep(60)
-                        continue
-                    
-                    # Handle 404 errors gracefully
-                    if response.status_code == 404:
-                        print(f"  ⚠️  No CVEs found for {year} (this may be normal)")
-                        print(f"  💡 NVD may not have data for this year yet")
-                        return True  # Not an error, just no data
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                except requests.exceptions.RequestException as e:
-                    error_msg = f"Request failed for year {year}: {str(e)}"
-                    print(f"  ❌ {error_msg}")
-                    self.results["errors"].append(error_msg)
-                    return False
-                
-                # Extract vulnerabilities
-                vulnerabilities = data.get("vulnerabilities", [])
-                total_results = data.get("totalResults", 0)
-                
-                if not vulnerabilities:
-                    print(f"  ✅ No more CVEs to fetch")
-                    break
-                
-                all_vulnerabilities.extend(vulnerabilities)
-                print(f"  📊 Retrieved {len(vulnerabilities)} CVEs ({len(all_vulnerabilities)}/{total_results})")
-                
-                # Check if we've retrieved all results
-                if len(all_vulnerabilities) >= total_results:
-                    break
-                
-                # Move to next batch
-                start_index += len(vulnerabilities)
-                
-                # Rate limiting delay
-                time.sleep(self.rate_limit_delay)
-            
-            # Save to file
-            output_data = {
-                "year": year,
-                "total_cves": len(all_vulnerabilities),
-                "downloaded_at": datetime.now().isoformat(),
-                "vulnerabilities": all_vulnerabilities
-            }
+            # Each page is appended to disk as it arrives, so peak
+            # memory stays at the pages in flight instead of the whole
+            # year plus its serialized copy
+            try:
+                with open(tmp_file, "wb") as raw:
+                    # Pages stream through the zstd compressor when
+                    # available, shrinking the file roughly 10x
+                    sink = (zstd.ZstdCompressor(level=3).stream_writer(raw)
+                            if zstd is not None else raw)
+                    try:
+                        # Tallied while the records stream past - the
+                        # severity histogram costs one dict bump per
+                        # CVE in a loop that already touches each one
+                        severity_counts: Dict[str, int] = {}
+
+                        def _write_page(vulnerabilities):
+                            if not self.full:
+                                # Projecting before serialization cuts
+                                # the written bytes several-fold
+                                vulnerabilities = map(_project, vulnerabilities)
+                            for vulnerability in vulnerabilities:
+                                severity = _severity(
+                                    vulnerability.get("cve", {}))
+                                if severity:
+                                    severity_counts[severity] = \
+                                        severity_counts.get(severity, 0) + 1
+                                sink.write(_dumps_line(vulnerability))
+                            sink.flush()
+
+                        cve_count = self._fetch_pages(
+                            {"pubStartDate": pub_start_date,
+                             "pubEndDate": pub_end_date},
+                            batch_size,
+                            not_found_ok=True,
+                            on_page=_write_page
+                        )
+                    finally:
+                        if sink is not raw:
+                            sink.close()
+            except Exception as e:
+                tmp_file.unlink(missing_ok=True)
+                error_msg = f"Request failed for year {year}: {str(e)}"
+                print(f"  ❌ {error_msg}")
+                self.results["errors"].append(error_msg)
+                return False
             
-            with open(output_file, "w") as f:
-                json.dump(output_data, f, indent=2)
+            # Handle 404 errors gracefully
+            if cve_count is None:
+                tmp_file.unlink(missing_ok=True)
+                print(f"  ⚠️  No CVEs found for {year} (this may be normal)")
+                print(f"  💡 NVD may not have data for this year yet")
+                return True  # Not an error, just no data
             
-            print(f"  ✅ Saved {len(all_vulnerabilities)} CVEs to {output_file.name}")
+            os.replace(tmp_file, output_file)
             
-            self.results["cve_files"].append({
+            # Header sidecar with just the count - the resume path
+            # reads this instead of the data file
+            _dump_json(self.phase_dir / f"cve_{year}.meta.json", {
                 "year": year,
-                "file": output_file.name,
-                "cve_count": len(all_vulnerabilities),
-                "status": "success"
+                "cve_count": cve_count,
+                "severity": severity_counts,
+                "downloaded_at": datetime.now().isoformat()
             })
-            self.results["total_cves"] += len(all_vulnerabilities)
+            
+            print(f"  ✅ Saved {cve_count} CVEs to {output_file.name}")
+            
+            with self._results_lock:
+                self.results["cve_files"].append({
+                    "year": year,
+                    "file": output_file.name,
+                    "cve_count": cve_count,
+                    "status": "success"
+                })
+                self.results["total_cves"] += cve_count
             
             return True
             
@@ -186,11 +728,73 @@ class Phase4Downloader:
             self.results["errors"].append(error_msg)
             return False
     
-    def download_cve_modified_recent(self, days: int = 120) -> bool:
+    def to_json(self, year: int) -> Optional[Path]:
+        """Convert a year's NDJSON download to the legacy JSON layout.
+
+        One-shot converter for consumers that expect the original
+        single-object cve_<year>.json file.
+
+        Args:
+            year: Year whose NDJSON file to convert
+
+        Returns:
+            Path to the written JSON file, or None if no NDJSON exists
+        """
+        ndjson_file = self.phase_dir / f"cve_{year}.ndjson.zst"
+        if not ndjson_file.exists():
+            ndjson_file = self.phase_dir / f"cve_{year}.ndjson"
+        if not ndjson_file.exists():
+            return None
+
+        with _open_lines(ndjson_file) as f:
+            vulnerabilities = [_loads(line) for line in f if line.strip()]
+
+        output_file = self.phase_dir / f"cve_{year}.json"
+        _dump_json(output_file, {
+            "year": year,
+            "total_cves": len(vulnerabilities),
+            "downloaded_at": datetime.now().isoformat(),
+            "vulnerabilities": vulnerabilities
+        }, indent=False)
+        return output_file
+    
+    def _merge_recent(self, output_file: Path, delta: List) -> List:
+        """Merge a cursor delta over the previously saved window.
+
+        A resumed run fetches only entries modified since the last
+        run; the rest of the window - mostly older-year CVEs that
+        exist in no year file - lives only in the recent file, so the
+        delta updates it in place instead of replacing it.
+
+        Args:
+            output_file: Existing cve_recent_modified.json
+            delta: Entries modified since the last run
+
+        Returns:
+            List: Previously saved entries with the delta folded in
+        """
+        try:
+            with open(output_file, "rb") as f:
+                existing = (orjson.loads(f.read()) if orjson is not None
+                            else json.loads(f.read()))
+        except (OSError, ValueError):
+            return delta
+        merged = {v.get("cve", {}).get("id"): v
+                  for v in existing.get("vulnerabilities", [])}
+        for vulnerability in delta:
+            merged[vulnerability.get("cve", {}).get("id")] = vulnerability
+        return list(merged.values())
+
+    def download_cve_modified_recent(self, days: int = 120,
+                                     known_modified: Optional[Dict[str, str]] = None) -> bool:
         """Download recently modified CVEs.
         
         Args:
             days: Number of days back to look for modifications
+            known_modified: CVE id -> lastModified map of entries the
+                year downloads already saved; matching entries at the
+                same modification state are dropped instead of being
+                stored twice
             
         Returns:
             bool: Success status
@@ -202,67 +806,96 @@ class Phase4Downloader:
         # Calculate date range
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
+        window_start = start_date
+        
+        # Resume from the saved cursor when it falls inside the
+        # window - a back-to-back re-run then asks NVD only for
+        # modifications since the last run instead of the full window
+        cursor_used = False
+        if self.last_mod_cursor:
+            try:
+                cursor_date = datetime.fromisoformat(self.last_mod_cursor)
+                if cursor_date > start_date:
+                    # 1ms past the newest record already on disk
+                    start_date = cursor_date + timedelta(milliseconds=1)
+                    cursor_used = True
+                    print(f"  ⏩ Resuming from last run ({self.last_mod_cursor})")
+            except ValueError:
+                pass
         
         # Use correct NVD API v2.0 format
-        mod_start_date = start_date.strftime("%Y-%m-%dT%H:%M:%S.000 UTC-00:00")
+        mod_start_date = start_date.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + " UTC-00:00"
         mod_end_date = end_date.strftime("%Y-%m-%dT%H:%M:%S.000 UTC-00:00")
         
-        all_vulnerabilities = []
-        start_index = 0
-        batch_size = 2000
-        
         try:
-            while True:
-                params = {
-                    "lastModStartDate": mod_start_date,
-                    "lastModEndDate": mod_end_date,
-                    "startIndex": start_index,
-                    "resultsPerPage": batch_size
-                }
-                
-                headers = {}
-                if self.api_key:
-                    headers["apiKey"] = self.api_key
-                
-                print(f"  📦 Fetching batch starting at index {start_index}...")
-                
-                try:
-                    response = requests.get(
-                        self.api_base,
-                        params=params,
-                        headers=headers,
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 429:
-                        print("  ⏸️  Rate limited - waiting 60 seconds...")
-                        time.sleep(60)
-                        continue
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                except requests.exceptions.RequestException as e:
-                    error_msg = f"Request failed for recent modifications: {str(e)}"
-                    print(f"  ❌ {error_msg}")
-                    self.results["errors"].append(error_msg)
-                    return False
-                
-                vulnerabilities = data.get("vulnerabilities", [])
-                total_results = data.get("totalResults", 0)
-                
-                if not vulnerabilities:
-                    break
-                
-                all_vulnerabilities.extend(vulnerabilities)
-                print(f"  📊 Retrieved {len(vulnerabilities)} CVEs ({len(all_vulnerabilities)}/{total_results})")
-                
-                if len(all_vulnerabilities) >= total_results:
-                    break
-                
-                start_index += len(vulnerabilities)
-                time.sleep(self.rate_limit_delay)
+            try:
+                all_vulnerabilities = self._fetch_pages(
+                    {"lastModStartDate": mod_start_date,
+                     "lastModEndDate": mod_end_date}
+                )
+            except Exception as e:
+                error_msg = f"Request failed for recent modifications: {str(e)}"
+                print(f"  ❌ {error_msg}")
+                self.results["errors"].append(error_msg)
+                return False
+            
+            if not self.full:
+                all_vulnerabilities = [_project(v)
+                                       for v in all_vulnerabilities]
+            
+            # The cursor advances over everything fetched, including
+            # entries the dedup below drops
+            fetched = all_vulnerabilities
+            if known_modified:
+                all_vulnerabilities = [
+                    v for v in all_vulnerabilities
+                    if (v.get("cve", {}).get("id") not in known_modified
+                        or v["cve"].get("lastModified", "")
+                        > known_modified[v["cve"]["id"]])
+                ]
+                skipped = len(fetched) - len(all_vulnerabilities)
+                if skipped:
+                    _log.info("  ⏭️  Skipped %d CVEs already saved by the"
+                              " year downloads", skipped)
             
+            if fetched and not all_vulnerabilities:
+                # Everything in the window is already in a year file
+                # at the same modification state - keep the existing
+                # recent file and just advance the cursor
+                print("  ✅ All modifications already covered by the year files")
+                self._save_cursor(fetched)
+                self.results["cve_files"].append({
+                    "type": "recent_modified",
+                    "file": output_file.name,
+                    "cve_count": 0,
+                    "status": "up_to_date"
+                })
+                return True
+            
+            if cursor_used and not all_vulnerabilities:
+                # Empty delta - nothing changed since the last run, so
+                # the existing file stays as is
+                print("  ✅ No modifications since last run")
+                self.results["cve_files"].append({
+                    "type": "recent_modified",
+                    "file": output_file.name,
+                    "cve_count": 0,
+                    "status": "up_to_date"
+                })
+                return True
+            
+            if cursor_used and all_vulnerabilities:
+                # The fetch covered only the post-cursor slice of the
+                # window - fold it into the file's previous contents
+                # so the rest of the window survives on disk
+                all_vulnerabilities = self._merge_recent(
+                    output_file, all_vulnerabilities)
+                # The merged file spans the window again, so it is
+                # stamped with the window start, not the slice start
+                mod_start_date = (
+                    window_start.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+                    + " UTC-00:00")
+
             # Save to file
             output_data = {
                 "date_range": f"{days} days",
@@ -273,8 +906,10 @@ class Phase4Downloader:
                 "vulnerabilities": all_vulnerabilities
             }
             
-            with open(output_file, "w") as f:
-                json.dump(output_data, f, indent=2)
+            # Compact form - the file is machine-read and a year-scale
+            # payload pretty-prints to roughly twice the bytes
+            _dump_json(output_file, output_data, indent=False)
+            self._save_cursor(fetched)
             
             print(f"  ✅ Saved {len(all_vulnerabilities)} recently modified CVEs")
             
@@ -293,9 +928,32 @@ class Phase4Downloader:
             self.results["errors"].append(error_msg)
             return False
     
+    def _save_cursor(self, vulnerabilities: List) -> None:
+        """Persist the newest lastModified timestamp for the next run.
+
+        Written to a temp file and moved into place with os.replace so
+        an interrupted run can never leave a truncated cursor.
+
+        Args:
+            vulnerabilities: Entries from the completed download
+        """
+        timestamps = [v.get("cve", {}).get("lastModified")
+                      for v in vulnerabilities]
+        timestamps = [t for t in timestamps if t]
+        if not timestamps:
+            return
+        tmp_file = self.cursor_file.with_suffix(".cursor.tmp")
+        tmp_file.write_text(max(timestamps))
+        os.replace(tmp_file, self.cursor_file)
+
     def create_cve_statistics(self) -> Dict:
         """Create aggregate CVE statistics.
-        
+
+        Years downloaded in this run are tallied from the in-memory
+        results; years only present on disk from earlier runs are
+        folded in through a (name, mtime)-keyed cache, so untouched
+        files are never re-counted.
+
         Returns:
             Dict: Statistics summary
         """
@@ -305,19 +963,76 @@ class Phase4Downloader:
             "total_cves": self.results["total_cves"],
             "files": len(self.results["cve_files"]),
             "by_year": {},
+            "severity_distribution": {},
             "generated_at": datetime.now().isoformat()
         }
         
+        cache_file = self.phase_dir / ".stats_cache.json"
+        try:
+            with open(cache_file, "rb") as f:
+                stats_cache = _loads(f.read())
+        except (OSError, ValueError):
+            stats_cache = {}
+        
         # Aggregate by year
         for cve_file in self.results["cve_files"]:
             if "year" in cve_file:
                 year = cve_file["year"]
                 stats["by_year"][year] = cve_file["cve_count"]
+                data_file = self.phase_dir / cve_file["file"]
+                try:
+                    stats_cache[cve_file["file"]] = {
+                        "mtime": data_file.stat().st_mtime,
+                        "cve_count": cve_file["cve_count"]
+                    }
+                except OSError:
+                    pass
+        
+        # Fold in years from earlier runs still on disk
+        for path in sorted(self.phase_dir.glob("cve_*")):
+            base, _, rest = path.name.partition(".")
+            if "meta" in rest or not rest.startswith(("json", "ndjson")):
+                continue
+            try:
+                year = int(base.rsplit("_", 1)[1])
+            except (IndexError, ValueError):
+                continue
+            if year in stats["by_year"]:
+                continue
+            mtime = path.stat().st_mtime
+            cached = stats_cache.get(path.name)
+            if cached and cached.get("mtime") == mtime:
+                cve_count = cached["cve_count"]
+            else:
+                try:
+                    cve_count = self._count_existing(path)
+                except Exception:
+                    continue
+                stats_cache[path.name] = {
+                    "mtime": mtime,
+                    "cve_count": cve_count
+                }
+            stats["by_year"][year] = cve_count
+            stats["total_cves"] += cve_count
+        
+        _dump_json(cache_file, stats_cache)
+        
+        # Fold in the per-year severity histograms tallied at write
+        # time - reading the tiny sidecars beats re-scanning the data
+        for year in stats["by_year"]:
+            meta_file = self.phase_dir / f"cve_{year}.meta.json"
+            try:
+                with open(meta_file, "rb") as f:
+                    severity_counts = _loads(f.read()).get("severity", {})
+            except (OSError, ValueError):
+                continue
+            for severity, count in severity_counts.items():
+                stats["severity_distribution"][severity] = \
+                    stats["severity_distribution"].get(severity, 0) + count
         
         # Save statistics
         stats_file = self.phase_dir / "cve_statistics.json"
-        with open(stats_file, "w") as f:
-            json.dump(stats, f, indent=2)
+        _dump_json(stats_file, stats)
         
         print(f"  ✅ Statistics saved to {stats_file.name}")
         
@@ -333,17 +1048,32 @@ class Phase4Downloader:
         print("🚨 PHASE 4: CVE Database (NVD)")
         print("=" * 80)
         
-        # Download CVEs for recent years
-        years_to_download = [2024, 2025]
-        
-        for year in years_to_download:
-            self.download_cve_by_year(year)
-        
-        # Download recently modified CVEs
-        self.download_cve_modified_recent(days=120)
-        
-        # Create statistics
-        stats = self.create_cve_statistics()
+        try:
+            # The yearly downloads are independent and network-bound,
+            # so they run concurrently; the shared token bucket keeps
+            # the combined request rate inside NVD's budget
+            years_to_download = [2024, 2025]
+            
+            with ThreadPoolExecutor(
+                    max_workers=len(years_to_download)) as executor:
+                futures = [executor.submit(self.download_cve_by_year, year)
+                           for year in years_to_download]
+                for future in futures:
+                    future.result()
+            
+            # The recent-modified window overlaps the current year, so
+            # this pass runs after the year downloads and drops every
+            # entry they already saved at the same modification state
+            self.download_cve_modified_recent(
+                120, known_modified=self._load_year_index())
+            
+            # Create statistics
+            stats = self.create_cve_statistics()
+        finally:
+            # Return the pooled connections - unless the session was
+            # injected, in which case its owner closes it
+            if self._owns_session:
+                self.session.close()
         
         # Print summary
         print("\n" + "=" * 80)
@@ -363,8 +1093,7 @@ class Phase4Downloader:
         
         # Save results
         results_file = self.phase_dir / "phase4_results.json"
-        with open(results_file, "w") as f:
-            json.dump(self.results, f, indent=2)
+        _dump_json(results_file, self.results)
         
         return self.results
 
@@ -386,10 +1115,19 @@ def main():
         type=int,
         help="Download CVEs for specific year"
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Store complete NVD payloads instead of the default projection"
+    )
     
     args = parser.parse_args()
     
-    downloader = Phase4Downloader(args.dir)
+    # Plain message format keeps the CLI output identical; INFO level
+    # shows per-page status
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
+    downloader = Phase4Downloader(args.dir, full=args.full)
     
     if args.year:
         downloader.download_cve_by_year(args.year)
@@ -8,27 +8,76 @@ cloud security, binary exploitation, APT intelligence, and more.
     Use ONLY in isolated environments (VMs with no network access).
 """
 
+import logging
 import os
 import subprocess
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, NamedTuple
+
+from _clone_worker import check_already_downloaded as _check_downloaded, clone_batch
+from _util import _dump_json
+
+# Per-dataset status goes through logging - concurrent workers
+# contend on the stdout lock with print, and log records are
+# filterable
+_log = logging.getLogger(__name__)
+
+
+# Optional Rust download backend for Hugging Face - streams each file
+# over several parallel HTTP range requests. The flag is only set when
+# the package is importable, because huggingface_hub refuses to start
+# with it set and the backend missing.
+try:
+    import hf_transfer
+except ImportError:
+    hf_transfer = None
+else:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+
+class _Category(NamedTuple):
+    """One repository category: banner, sources and bookkeeping keys."""
+    banner: str
+    repos: Dict[str, str]
+    target_dir: Path
+    result_key: str
+    error_label: str
+    live_malware: bool = False
 
 
 class Phase5Downloader:
     """Downloads advanced threat intelligence and black hat tactics datasets."""
     
-    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False, skip_malware: bool = False):
+    def __init__(self, base_dir: str = "./cybersecurity_datasets", update: bool = False, skip_malware: bool = False,
+                 max_concurrent: int = None, recurse_submodules: bool = True):
         """Initialize the Phase 5 downloader.
         
         Args:
             base_dir: Base directory for all datasets
             update: Whether to update existing repositories
             skip_malware: Skip downloading live malware samples
+            max_concurrent: Maximum git processes to run at once
+                (default: min(32, 2x CPU count))
+            recurse_submodules: Clone submodules too; several targets
+                (frida, MobSF, gophish) keep real content in them
         """
         self.base_dir = Path(base_dir)
         self.update = update
         self.skip_malware = skip_malware
+        self.max_concurrent = max_concurrent or min(32, (os.cpu_count() or 4) * 2)
+        self.recurse_submodules = recurse_submodules
+        # Guards results mutations when HF datasets download in parallel
+        self._results_lock = threading.Lock()
+        
+        # huggingface_hub drags in a few hundred ms of imports; doing
+        # them on a background thread hides that behind the clones
+        # that run before the HF datasets are touched
+        self._snapshot_download = None
+        self._hf_import_thread = threading.Thread(
+            target=self._prefetch_imports, daemon=True)
+        self._hf_import_thread.start()
         self.phase_dir = self.base_dir / "phase5_advanced_threats"
         
         # Create subdirectories
@@ -41,11 +90,27 @@ class Phase5Downloader:
         self.apt_dir = self.phase_dir / "apt_intelligence"
         self.hf_dir = self.phase_dir / "huggingface_datasets"
         
-        # Create all directories
+        # Create all directories: the shared parent chain is resolved
+        # once, then each leaf is one mkdir attempt - no per-leaf
+        # exists() pre-check, the EEXIST answer comes from the same
+        # syscall that would have created it
+        self.phase_dir.mkdir(parents=True, exist_ok=True)
         for directory in [self.malware_dir, self.phishing_dir, self.mobile_dir, 
                           self.crypto_dir, self.cloud_dir, self.binary_dir, 
                           self.apt_dir, self.hf_dir]:
-            directory.mkdir(parents=True, exist_ok=True)
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                pass
+        
+        # Object store shared by every phase - repos referencing it
+        # skip fetching any objects it already holds
+        self.shared_objects = self.base_dir / ".shared_git_objects"
+        if not (self.shared_objects / "objects").exists():
+            subprocess.run(
+                ["git", "init", "--bare", "--quiet", str(self.shared_objects)],
+                capture_output=True
+            )
         
         self.results = {
             "malware_repos": [],
@@ -59,6 +124,11 @@ class Phase5Downloader:
             "errors": []
         }
         
+        # Per-category [success, total] tallies, bumped as results
+        # are appended so the summary never re-scans the entry lists
+        self._counts = {key: [0, 0]
+                        for key in self.results if key != "errors"}
+        
         # Define repositories
         self.malware_repos = {
             "malware_analysis": "https://github.com/rshipp/awesome-malware-analysis",
@@ -136,94 +206,150 @@ class Phase5Downloader:
             "phishing_emails": "ealvaradob/phishing-dataset",
             "android_malware": "EMCS-JKUAT/android-malware",
         }
+        
+        # One table drives every repository category; the public
+        # download_* methods are thin wrappers over download_category
+        self.categories = {
+            "malware": _Category(
+                "🦠 Downloading Malware Analysis Repositories",
+                self.malware_repos, self.malware_dir,
+                "malware_repos", "Malware repo"),
+            "malware_live": _Category(
+                "☠️  Downloading LIVE Malware Samples (DANGER ZONE)",
+                self.malware_live_repos, self.malware_dir,
+                "malware_repos", "Live malware repo", live_malware=True),
+            "phishing": _Category(
+                "🎣 Downloading Phishing & Social Engineering Tools",
+                self.phishing_repos, self.phishing_dir,
+                "phishing_repos", "Phishing repo"),
+            "mobile": _Category(
+                "📱 Downloading Mobile Security Tools",
+                self.mobile_security_repos, self.mobile_dir,
+                "mobile_repos", "Mobile security repo"),
+            "crypto": _Category(
+                "₿ Downloading Crypto Attack Tools",
+                self.crypto_attack_repos, self.crypto_dir,
+                "crypto_repos", "Crypto attack repo"),
+            "cloud": _Category(
+                "☁️  Downloading Cloud Security Tools",
+                self.cloud_security_repos, self.cloud_dir,
+                "cloud_repos", "Cloud security repo"),
+            "binary": _Category(
+                "💾 Downloading Binary Exploitation & Reverse Engineering Tools",
+                self.binary_exploit_repos, self.binary_dir,
+                "binary_repos", "Binary exploitation repo"),
+            "apt": _Category(
+                "🎯 Downloading APT & Threat Intelligence",
+                self.apt_repos, self.apt_dir,
+                "apt_repos", "APT intelligence repo"),
+        }
+    
+    def download_category(self, category: _Category) -> Dict[str, bool]:
+        """Download one repository category.
+        
+        Args:
+            category: The category's banner, repos and result keys
+            
+        Returns:
+            Dict mapping repo names to success status
+        """
+        print("\n" + "=" * 80)
+        print(category.banner)
+        print("=" * 80)
+        
+        return self._clone_category(
+            category.repos, category.target_dir, category.result_key,
+            category.error_label, live_malware=category.live_malware)
+    
+    def _prefetch_imports(self) -> None:
+        """Import huggingface_hub ahead of need, off the main thread."""
+        try:
+            from huggingface_hub import snapshot_download
+        except ImportError:
+            return
+        self._snapshot_download = snapshot_download
     
     def check_already_downloaded(self, target_dir: Path) -> bool:
         """Check if repository already exists and is valid.
         
+        Delegates to the shared clone worker's cached probe.
+        
         Args:
             target_dir: Directory to check
             
         Returns:
             bool: True if already exists and valid
         """
-        if not target_dir.exists():
-            return False
-        
-        # Check if it's a valid git repo or has content
-        if (target_dir / ".git").exists():
-            return True
-        
-        # Check if directory has any content
-        try:
-            if len(list(target_dir.iterdir())) > 0:
-                return True
-        except Exception:
-            pass
-        
-        return False
+        return _check_downloaded(target_dir)
     
-    def clone_repo(self, url: str, target_dir: Path) -> Tuple[bool, str]:
-        """Clone a git repository with error handling.
+    def _clone_category(self, repos: Dict[str, str], target_dir: Path,
+                        result_key: str, error_label: str,
+                        live_malware: bool = False) -> Dict[str, bool]:
+        """Clone one category's repositories concurrently.
+        
+        The clones run through the shared worker's event loop, so a
+        category's wall-clock is roughly its slowest clone instead of
+        the sum, bounded by max_concurrent. Repositories already on
+        disk are settled from one cached probe and never enter the
+        batch, so the worker slots go entirely to repos that need
+        network I/O; with --update everything goes through, since the
+        worker does the refresh.
         
         Args:
-            url: Git repository URL
-            target_dir: Target directory for cloning
+            repos: Mapping of repo name to URL
+            target_dir: Directory the repositories are cloned under
+            result_key: Key in self.results the outcomes append to
+            error_label: Prefix for error log entries
+            live_malware: Tag the result entries as live malware
             
         Returns:
-            Tuple of (success: bool, message: str)
+            Dict mapping repo names to success status
         """
-        try:
-            # Check if already downloaded
-            if self.check_already_downloaded(target_dir):
-                if self.update and (target_dir / ".git").exists():
-                    print(f"  🔄 Updating {target_dir.name}...")
-                    try:
-                        result = subprocess.run(
-                            ["git", "-C", str(target_dir), "pull"],
-                            capture_output=True,
-                            text=True,
-                            timeout=300
-                        )
-                        if result.returncode == 0:
-                            print(f"  ✅ Updated {target_dir.name}")
-                            return True, f"Updated: {target_dir.name}"
-                        else:
-                            print(f"  ⚠️  Update failed, keeping existing: {target_dir.name}")
-                            return True, f"Already exists: {target_dir.name}"
-                    except Exception as e:
-                        print(f"  ⚠️  Update failed: {e}, keeping existing")
-                        return True, f"Already exists: {target_dir.name}"
-                else:
-                    print(f"  ⏭️  Already exists: {target_dir.name}")
-                    return True, f"Already exists: {target_dir.name}"
-            
-            # Clone the repository
-            print(f"  📥 Cloning {target_dir.name}...")
-            result = subprocess.run(
-                ["git", "clone", "--depth", "1", url, str(target_dir)],
-                capture_output=True,
-                text=True,
-                timeout=600
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ Cloned {target_dir.name}")
-                return True, f"Cloned: {target_dir.name}"
+        results = {}
+        
+        def _record(name, url, success, message):
+            results[name] = success
+            entry = {
+                "name": name,
+                "url": url,
+                "success": success,
+                "message": message
+            }
+            if live_malware:
+                entry["live_malware"] = True
+            self.results[result_key].append(entry)
+            self._counts[result_key][1] += 1
+            if success:
+                self._counts[result_key][0] += 1
+            if not success:
+                self.results["errors"].append(f"{error_label} {name}: {message}")
+        
+        todo = []
+        for name, url in repos.items():
+            if not self.update and self.check_already_downloaded(target_dir / name):
+                _log.info("  ⏭️  Already exists: %s", name)
+                _record(name, url, True, f"Already exists: {name}")
             else:
-                error_msg = result.stderr.strip()
-                print(f"  ❌ Failed to clone {target_dir.name}: {error_msg}")
-                return False, f"Failed: {error_msg}"
+                todo.append((url, name))
         
-        except subprocess.TimeoutExpired:
-            print(f"  ❌ Timeout cloning {target_dir.name}")
-            return False, "Timeout"
-        except Exception as e:
-            print(f"  ❌ Error cloning {target_dir.name}: {e}")
-            return False, str(e)
+        if todo:
+            outcomes = clone_batch(todo, target_dir, self.max_concurrent,
+                                   update=self.update,
+                                   reference=self.shared_objects,
+                                   recurse_submodules=self.recurse_submodules,
+                                   allow_pygit2=True)
+            for (url, name), (success, message) in zip(todo, outcomes):
+                _record(name, url, success, message)
+        
+        return results
     
-    def show_safety_warning(self) -> bool:
+    @staticmethod
+    def show_safety_warning() -> bool:
         """Show comprehensive safety warning for malware downloads.
-        
+
+        Static so orchestrators can prompt before the phase (or its
+        output capture) starts.
+
         Returns:
             bool: True if user accepts risks
         """
@@ -264,32 +390,15 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("🦠 Downloading Malware Analysis Repositories")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.malware_repos.items():
-            target_dir = self.malware_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["malware_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Malware repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["malware"])
     
-    def download_malware_live_samples(self) -> Dict[str, bool]:
+    def download_malware_live_samples(self, confirmed: bool = None) -> Dict[str, bool]:
         """Download LIVE malware sample repositories (WITH SAFETY CHECK).
         
+        Args:
+            confirmed: Outcome of an earlier safety prompt; when None
+                the prompt is shown here
+        
         Returns:
             Dict mapping repo names to success status
         """
@@ -298,33 +407,13 @@ class Phase5Downloader:
             return {}
         
         # Show safety warning
-        if not self.show_safety_warning():
+        if confirmed is None:
+            confirmed = self.show_safety_warning()
+        if not confirmed:
             print("\n⏭️  Skipping live malware samples (safety check not confirmed)")
             return {}
         
-        print("\n" + "=" * 80)
-        print("☠️  Downloading LIVE Malware Samples (DANGER ZONE)")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.malware_live_repos.items():
-            target_dir = self.malware_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["malware_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message,
-                "live_malware": True
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Live malware repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["malware_live"])
     
     def download_phishing_tools(self) -> Dict[str, bool]:
         """Download phishing and social engineering tools.
@@ -332,28 +421,7 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("🎣 Downloading Phishing & Social Engineering Tools")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.phishing_repos.items():
-            target_dir = self.phishing_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["phishing_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Phishing repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["phishing"])
     
     def download_mobile_security(self) -> Dict[str, bool]:
         """Download mobile security (Android/iOS) repositories.
@@ -361,28 +429,7 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("📱 Downloading Mobile Security Tools")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.mobile_security_repos.items():
-            target_dir = self.mobile_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["mobile_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Mobile security repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["mobile"])
     
     def download_crypto_attacks(self) -> Dict[str, bool]:
         """Download cryptojacking and crypto attack repositories.
@@ -390,28 +437,7 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("₿ Downloading Crypto Attack Tools")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.crypto_attack_repos.items():
-            target_dir = self.crypto_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["crypto_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Crypto attack repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["crypto"])
     
     def download_cloud_security(self) -> Dict[str, bool]:
         """Download cloud security (AWS/Azure/GCP) repositories.
@@ -419,28 +445,7 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("☁️  Downloading Cloud Security Tools")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.cloud_security_repos.items():
-            target_dir = self.cloud_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["cloud_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Cloud security repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["cloud"])
     
     def download_binary_exploitation(self) -> Dict[str, bool]:
         """Download binary exploitation and reverse engineering repositories.
@@ -448,28 +453,7 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("💾 Downloading Binary Exploitation & Reverse Engineering Tools")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.binary_exploit_repos.items():
-            target_dir = self.binary_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["binary_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"Binary exploitation repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["binary"])
     
     def download_apt_intelligence(self) -> Dict[str, bool]:
         """Download APT reports and threat intelligence repositories.
@@ -477,28 +461,7 @@ class Phase5Downloader:
         Returns:
             Dict mapping repo names to success status
         """
-        print("\n" + "=" * 80)
-        print("🎯 Downloading APT & Threat Intelligence")
-        print("=" * 80)
-        
-        results = {}
-        
-        for repo_name, repo_url in self.apt_repos.items():
-            target_dir = self.apt_dir / repo_name
-            success, message = self.clone_repo(repo_url, target_dir)
-            results[repo_name] = success
-            
-            self.results["apt_repos"].append({
-                "name": repo_name,
-                "url": repo_url,
-                "success": success,
-                "message": message
-            })
-            
-            if not success:
-                self.results["errors"].append(f"APT intelligence repo {repo_name}: {message}")
-        
-        return results
+        return self.download_category(self.categories["apt"])
     
     def download_hf_datasets(self) -> Dict[str, bool]:
         """Download Hugging Face datasets for malware, phishing, etc.
@@ -510,60 +473,110 @@ class Phase5Downloader:
         print("🤗 Downloading Hugging Face Datasets")
         print("=" * 80)
         
-        try:
-            from huggingface_hub import snapshot_download
-        except ImportError:
+        # The import started on a background thread in __init__; the
+        # join is a no-op when it has long since finished
+        self._hf_import_thread.join()
+        snapshot_download = self._snapshot_download
+        if snapshot_download is None:
             print("  ⚠️  huggingface-hub not installed - skipping HF datasets")
             print("     Install with: pip install huggingface-hub")
             return {}
         
-        results = {}
+        # One pooled session behind every hub call - the concurrent
+        # datasets then reuse warm connections to huggingface.co
+        # instead of each paying its own DNS and TLS handshakes, and
+        # transient errors retry with backoff inside the adapter
+        try:
+            from huggingface_hub import configure_http_backend
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+        except ImportError:
+            pass  # older huggingface_hub without a configurable backend
+        else:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=32,
+                max_retries=Retry(total=3, backoff_factor=0.5)
+            ))
+            configure_http_backend(backend_factory=lambda: session)
+        
+        # The datasets are independent and network-bound, so they
+        # download concurrently; within each, snapshot_download pulls
+        # files on several workers at once
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {
+                name: executor.submit(
+                    self._download_hf_dataset, snapshot_download, name, dataset_id)
+                for name, dataset_id in self.huggingface_datasets.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+    
+    def _download_hf_dataset(self, snapshot_download, dataset_name: str,
+                             dataset_id: str) -> bool:
+        """Download one Hugging Face dataset snapshot.
         
-        for dataset_name, dataset_id in self.huggingface_datasets.items():
-            print(f"\n  📥 Downloading {dataset_name} ({dataset_id})...")
-            target_dir = self.hf_dir / dataset_name
+        Args:
+            snapshot_download: The huggingface_hub download entry point
+            dataset_name: Local directory name for the dataset
+            dataset_id: Hub repository id
             
-            try:
-                if self.check_already_downloaded(target_dir):
-                    print(f"  ⏭️  Already exists: {dataset_name}")
-                    results[dataset_name] = True
+        Returns:
+            bool: Success status
+        """
+        _log.info("  📥 Downloading %s (%s)...", dataset_name, dataset_id)
+        target_dir = self.hf_dir / dataset_name
+        
+        try:
+            if self.check_already_downloaded(target_dir):
+                _log.info("  ⏭️  Already exists: %s", dataset_name)
+                with self._results_lock:
                     self.results["hf_datasets"].append({
                         "name": dataset_name,
                         "id": dataset_id,
                         "success": True,
                         "message": "Already exists"
                     })
-                    continue
-                
-                snapshot_download(
-                    repo_id=dataset_id,
-                    repo_type="dataset",
-                    local_dir=str(target_dir),
-                    local_dir_use_symlinks=False
-                )
-                
-                print(f"  ✅ Downloaded {dataset_name}")
-                results[dataset_name] = True
-                
+                    self._counts["hf_datasets"][0] += 1
+                    self._counts["hf_datasets"][1] += 1
+                return True
+            
+            # "auto" hardlinks out of the HF cache when the target is
+            # on the same filesystem, instead of copying every file
+            snapshot_download(
+                repo_id=dataset_id,
+                repo_type="dataset",
+                local_dir=str(target_dir),
+                local_dir_use_symlinks="auto",
+                max_workers=8,
+                etag_timeout=30
+            )
+            
+            _log.info("  ✅ Downloaded %s", dataset_name)
+            with self._results_lock:
                 self.results["hf_datasets"].append({
                     "name": dataset_name,
                     "id": dataset_id,
                     "success": True,
                     "message": "Downloaded successfully"
                 })
-                
-            except Exception as e:
-                print(f"  ❌ Failed to download {dataset_name}: {e}")
-                results[dataset_name] = False
+                self._counts["hf_datasets"][0] += 1
+                self._counts["hf_datasets"][1] += 1
+            return True
+            
+        except Exception as e:
+            _log.warning("  ❌ Failed to download %s: %s", dataset_name, e)
+            with self._results_lock:
                 self.results["hf_datasets"].append({
                     "name": dataset_name,
                     "id": dataset_id,
                     "success": False,
                     "message": str(e)
                 })
+                self._counts["hf_datasets"][1] += 1
                 self.results["errors"].append(f"HF dataset {dataset_name}: {e}")
-        
-        return results
+            return False
     
     def print_summary(self):
         """Print download summary."""
@@ -572,23 +585,25 @@ class Phase5Downloader:
         print("=" * 80)
         
         categories = [
-            ("Malware Analysis", self.results["malware_repos"]),
-            ("Phishing & Social Engineering", self.results["phishing_repos"]),
-            ("Mobile Security", self.results["mobile_repos"]),
-            ("Crypto Attacks", self.results["crypto_repos"]),
-            ("Cloud Security", self.results["cloud_repos"]),
-            ("Binary Exploitation", self.results["binary_repos"]),
-            ("APT Intelligence", self.results["apt_repos"]),
-            ("Hugging Face Datasets", self.results["hf_datasets"]),
+            ("Malware Analysis", "malware_repos"),
+            ("Phishing & Social Engineering", "phishing_repos"),
+            ("Mobile Security", "mobile_repos"),
+            ("Crypto Attacks", "crypto_repos"),
+            ("Cloud Security", "cloud_repos"),
+            ("Binary Exploitation", "binary_repos"),
+            ("APT Intelligence", "apt_repos"),
+            ("Hugging Face Datasets", "hf_datasets"),
         ]
         
         total_repos = 0
         total_success = 0
         
-        for category_name, repos in categories:
-            if repos:
-                success_count = sum(1 for r in repos if r.get("success", False))
-                total_count = len(repos)
+        # The tallies were kept while results were appended, so this
+        # is one counter read per category rather than a second pass
+        # over every entry
+        for category_name, result_key in categories:
+            success_count, total_count = self._counts[result_key]
+            if total_count:
                 total_repos += total_count
                 total_success += success_count
                 print(f"  {category_name}: {success_count}/{total_count} successful")
@@ -608,14 +623,17 @@ class Phase5Downloader:
         """Save phase results to JSON file."""
         results_file = self.phase_dir / "phase5_results.json"
         
-        with open(results_file, "w") as f:
-            json.dump(self.results, f, indent=2)
+        _dump_json(results_file, self.results)
         
         print(f"\n📄 Results saved to: {results_file}")
     
-    def run(self) -> Dict:
+    def run(self, live_confirmed: bool = None) -> Dict:
         """Execute Phase 5 downloads.
-        
+
+        Args:
+            live_confirmed: Pre-resolved outcome of the live-malware
+                safety prompt; when None the prompt is shown here
+
         Returns:
             Dict: Download results
         """
@@ -629,16 +647,24 @@ class Phase5Downloader:
         
         print()
         
-        # Download all categories
+        # The safety prompt runs up front so the phase never stalls
+        # mid-run waiting for input; orchestrators that capture stdout
+        # resolve it even earlier and pass the answer in
+        if live_confirmed is None:
+            live_confirmed = (not self.skip_malware) and self.show_safety_warning()
+        
+        # Download all categories, small before large: the KB-MB
+        # metadata and tool repos finish while they would otherwise
+        # queue behind the multi-GB live-malware and dataset pulls
+        self.download_apt_intelligence()
+        self.download_binary_exploitation()
         self.download_malware_analysis()
-        self.download_malware_live_samples()  # Has built-in safety check
+        self.download_crypto_attacks()
         self.download_phishing_tools()
         self.download_mobile_security()
-        self.download_crypto_attacks()
         self.download_cloud_security()
-        self.download_binary_exploitation()
-        self.download_apt_intelligence()
         self.download_hf_datasets()
+        self.download_malware_live_samples(confirmed=live_confirmed)
         
         # Print summary
         self.print_summary()
@@ -686,13 +712,32 @@ Examples:
         help="Update existing repositories (git pull)"
     )
     
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=None,
+        help="Maximum concurrent git clones (default: min(32, 2x CPU count))"
+    )
+    
+    parser.add_argument(
+        "--no-submodules",
+        action="store_true",
+        help="Skip cloning submodules (the previous behavior)"
+    )
+    
     args = parser.parse_args()
     
+    # Per-repo clone status comes from the shared worker's logger;
+    # the plain message format keeps the CLI output identical
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Create and run downloader
     downloader = Phase5Downloader(
         base_dir=args.dir,
         update=args.update,
-        skip_malware=args.skip_malware
+        skip_malware=args.skip_malware,
+        max_concurrent=args.max_concurrent,
+        recurse_submodules=not args.no_submodules
     )
     
     downloader.run()